@@ -0,0 +1,318 @@
+import os
+import json
+import hashlib
+
+import pandas as pd
+import networkx as nx
+from pyvis.network import Network
+
+from analysis_pool import AnalysisError
+from cooccurrence_state import CooccurrenceState, preprocess_text, sliding_window_cooccurrence
+from graph_layout import GraphLayoutCache, compute_layout, graph_to_json, prune_graph
+from tweet_index import TweetIndex
+from topic_models import TopicModelCache
+
+# CPU-bound analysis jobs executed in the AnalysisPool worker processes.
+# Jobs receive file paths, versions and parameters and keep their own
+# per-process copies of the co-occurrence states, keyword indexes, layouts and
+# topic models, so no data frames cross the process boundary. The server routes
+# jobs by key, so each cache entry lives on one worker; every job that reads the
+# keyword index of a tweets file runs on the same worker, which builds it at startup.
+
+_WORKER_STATES = {}
+_WORKER_INDEXES = {}
+_LAYOUT_CACHE = GraphLayoutCache(max_entries=32)
+_TOPIC_MODELS = TopicModelCache(max_entries=32)
+
+def _worker_state(tweets_file: str, state_file: str, state_version: int) -> CooccurrenceState:
+    """
+    This worker's copy of the co-occurrence state, reloaded when the server has saved a newer version.
+    """
+    state = _WORKER_STATES.get(tweets_file)
+    if state is None or state.version != state_version:
+        state = CooccurrenceState.load(tweets_file, preprocess_text, state_file=state_file)
+        if state.version != state_version:
+            state.sync()
+            state.version = state_version
+        _WORKER_STATES[tweets_file] = state
+    return state
+
+def _worker_index(tweets_file: str) -> TweetIndex:
+    """This worker's keyword index for a tweets file, synced with appended rows."""
+    index = _WORKER_INDEXES.get(tweets_file)
+    if index is None:
+        index = TweetIndex(tweets_file)
+        _WORKER_INDEXES[tweets_file] = index
+    index.sync()
+    return index
+
+def build_index_job(tweets_file: str) -> int:
+    """Builds (or syncs) this worker's keyword index ahead of the first query. Returns its size."""
+    if not os.path.exists(tweets_file):
+        return 0
+    return len(_worker_index(tweets_file))
+
+#########################################
+# ------- Co-occurrence Jobs ---------- #
+#########################################
+
+def render_term_cooccurrence(G: nx.Graph, positions: dict = None, output_file: str = "term_cooccurrence_graph.html"):
+    """
+    Writes the pyvis visualization of a co-occurrence graph.
+    Nodes are placed at server-computed coordinates and browser physics is disabled,
+    so large graphs render without running Barnes-Hut in the client.
+    """
+    if len(G.nodes()) == 0:
+        raise AnalysisError(404, "No significant co-occurrences found with current parameters.")
+    if positions is None:
+        positions = compute_layout(G)
+    net = Network(height="800px", width="100%", bgcolor="#ffffff", font_color="black", notebook=False, select_menu=True)
+    max_count = max([data.get('count', 1) for _, data in G.nodes(data=True)])
+    min_size, max_size = 10, 50
+    for node, attr in G.nodes(data=True):
+        count = attr.get('count', 0)
+        x, y = positions[node]
+        size = min_size + (count / max_count) * (max_size - min_size)
+        net.add_node(node, title=f"Term: {node}<br>Frequency: {count}<br>Connections: {G.degree(node)}",
+                     value=count, size=size, x=x, y=y, physics=False)
+    for u, v, attr in G.edges(data=True):
+        weight = attr.get('weight', 1)
+        net.add_edge(u, v, value=weight, title=f"Co-occurrence: {weight}")
+    net.set_options("""
+    var options = {
+      "nodes": {
+        "borderWidth": 2,
+        "scaling": {"min": 10, "max": 50},
+        "color": {"border": "#2B7CE9", "background": "#97C2FC"},
+        "font": {"size": 16, "face": "arial", "color": "#343434", "align": "center"}
+      },
+      "edges": {
+        "color": {"color": "#848484", "inherit": false},
+        "smooth": false,
+        "width": 0.5
+      },
+      "physics": {"enabled": false},
+      "interaction": {"hideEdgesOnDrag": true}
+    }
+    """)
+    # Written aside and moved into place, so a reader never sees a half-written page
+    tmp_file = f"{output_file}.{os.getpid()}.tmp"
+    net.write_html(tmp_file)
+    os.replace(tmp_file, output_file)
+    return G, output_file
+
+def cooccurrence_html_file(layout_key: tuple) -> str:
+    """
+    Page of one co-occurrence layout: named by a digest of its parameters and the state
+    version, so requests with different parameters never overwrite each other's graph.
+    Pages of the same parameters for older state versions are removed.
+    """
+    tweets_file, state_version, *params = layout_key
+    digest = hashlib.sha1(json.dumps([tweets_file, *params]).encode("utf-8")).hexdigest()[:16]
+    prefix = f"term_cooccurrence_graph-{digest}-"
+    for name in os.listdir("."):
+        if name.startswith(prefix) and name.endswith(".html") and name != f"{prefix}{state_version}.html":
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+    return f"{prefix}{state_version}.html"
+
+def layout_key(tweets_file: str, state_version: int, *params) -> tuple:
+    """Layout cache key: the tweets file, its co-occurrence state version and the graph parameters."""
+    return (tweets_file, state_version, *params)
+
+def get_cooccurrence_layout(
+    tweets_file: str,
+    state_file: str,
+    state_version: int,
+    min_term_count: int = 2,
+    max_terms: int = 200,
+    min_edge_weight: int = 2,
+    edge_budget: int = 2000,
+    prune_method: str = "weight",
+    backbone_alpha: float = 0.05
+):
+    """
+    Returns the pruned co-occurrence graph and its server-side layout for a tweets file.
+    Layouts are cached per state version and parameters, so repeated queries skip the layout work.
+    """
+    key = layout_key(tweets_file, state_version, min_term_count, max_terms, min_edge_weight,
+                     edge_budget, prune_method, backbone_alpha)
+    cached = _LAYOUT_CACHE.get(key)
+    if cached is not None:
+        return cached
+    state = _worker_state(tweets_file, state_file, state_version)
+    graph = state.build_graph(
+        min_term_count=min_term_count,
+        max_terms=max_terms,
+        min_edge_weight=min_edge_weight
+    )
+    try:
+        graph = prune_graph(graph, edge_budget=edge_budget, method=prune_method, alpha=backbone_alpha)
+    except ValueError as e:
+        raise AnalysisError(400, str(e))
+    if len(graph.nodes()) == 0:
+        raise AnalysisError(404, "No significant co-occurrences found with current parameters.")
+    positions = compute_layout(graph)
+    _LAYOUT_CACHE.put(key, (graph, positions))
+    return graph, positions
+
+def cooccurrence_job(
+    tweets_file: str,
+    state_file: str,
+    state_version: int,
+    min_term_count: int = 2,
+    max_terms: int = 200,
+    min_edge_weight: int = 2,
+    edge_budget: int = 2000,
+    prune_method: str = "weight",
+    backbone_alpha: float = 0.05
+):
+    """
+    Builds, lays out and renders the co-occurrence graph.
+    Returns the graph summary, the visualization path and the prompt for the AI analysis.
+    """
+    graph, positions = get_cooccurrence_layout(
+        tweets_file,
+        state_file,
+        state_version,
+        min_term_count=min_term_count,
+        max_terms=max_terms,
+        min_edge_weight=min_edge_weight,
+        edge_budget=edge_budget,
+        prune_method=prune_method,
+        backbone_alpha=backbone_alpha
+    )
+    html_file = cooccurrence_html_file(layout_key(
+        tweets_file, state_version, min_term_count, max_terms, min_edge_weight,
+        edge_budget, prune_method, backbone_alpha
+    ))
+    if not os.path.exists(html_file):
+        render_term_cooccurrence(graph, positions, output_file=html_file)
+    return {
+        "graph": summarize_graph(graph),
+        "visualization_file": html_file,
+        "prompt": build_analysis_prompt(graph)
+    }
+
+def cooccurrence_graph_job(tweets_file: str, state_file: str, state_version: int, **params):
+    """Compact JSON export of the laid-out co-occurrence graph."""
+    graph, positions = get_cooccurrence_layout(tweets_file, state_file, state_version, **params)
+    return graph_to_json(graph, positions)
+
+def cooccurrence_windows_job(
+    tweets_file: str,
+    start: str = None,
+    end: str = None,
+    window: str = None,
+    step: str = None,
+    min_term_count: int = 2,
+    max_terms: int = 50,
+    min_edge_weight: int = 2,
+    max_windows: int = 500,
+    keyword: str = None
+):
+    """
+    Computes the term network for each time window over the tweets file,
+    optionally restricted to the tweets matching a keyword query.
+    """
+    try:
+        index = _worker_index(tweets_file)
+    except Exception as e:
+        raise AnalysisError(500, f"Error loading tweets file: {str(e)}")
+    with index.lock:
+        doc_ids = index.search(keyword) if keyword else range(len(index))
+        df = pd.DataFrame({
+            "text": [index.texts[i] for i in doc_ids],
+            "timestamp": [index.timestamps[i] for i in doc_ids]
+        })
+    if df.empty:
+        raise AnalysisError(400, "Tweets data is empty.")
+    windows = []
+    try:
+        for window_start, window_end, counts in sliding_window_cooccurrence(
+            df, preprocess_text, window=window, step=step, start=start, end=end, max_windows=max_windows
+        ):
+            key_terms = counts.key_terms(min_count=min_term_count, max_terms=max_terms)
+            edges = counts.top_edges(key_terms, min_edge_weight=min_edge_weight)
+            windows.append({
+                "start": window_start.isoformat(),
+                "end": window_end.isoformat(),
+                "num_tweets": counts.num_tweets,
+                "terms": key_terms,
+                "edges": [[term1, term2, weight] for term1, term2, weight in edges]
+            })
+    except ValueError as e:
+        raise AnalysisError(400, f"Invalid window parameters: {str(e)}")
+    return windows
+
+def summarize_graph(G: nx.Graph):
+    """
+    Small JSON-friendly summary of a co-occurrence graph.
+    """
+    main_node, main_degree = max(G.degree(), key=lambda x: x[1])
+    return {
+        "num_nodes": G.number_of_nodes(),
+        "num_edges": G.number_of_edges(),
+        "main_term": main_node,
+        "main_term_degree": main_degree
+    }
+
+def build_analysis_prompt(G: nx.Graph):
+    """
+    Build the Gemini prompt describing the co-occurrence graph.
+    """
+    main_node, main_degree = max(G.degree(), key=lambda x: x[1])
+    nodes_count_json = json.dumps({node: data.get('count', 0) for node, data in G.nodes(data=True)}, indent=4)
+    loose_threshold = 2
+    loosely_linked = [n for n in G.neighbors(main_node) if G.degree(n) <= loose_threshold]
+    loosely_linked_json = json.dumps({node: G.degree(node) for node in loosely_linked}, indent=4)
+    prompt = f'''
+    I have created a graph showing how terms co-occur in tweets from Twitter data.
+    The main term is '{main_node}' which has {main_degree} connections.
+    
+    These are my terms and their frequencies:
+    {nodes_count_json}
+    
+    These are terms loosely linked to my main term:
+    {loosely_linked_json}
+    
+    Give me an analysis of the key topics and themes in this conversation network.
+    Identify any clusters of terms that might represent distinct narratives or topics.
+    
+    Output in JSON format with:
+    - key_themes: list of main themes/topics identified
+    - topic_clusters: object with cluster names as keys and relevant terms as values
+    - interesting_insights: list of 3-5 observations about the data
+    - summary_report: brief analysis of what this term network reveals
+    '''
+    return prompt
+
+#########################################
+# ---------- Topic Model Jobs --------- #
+#########################################
+
+def semantic_topics_job(tweets_file: str, keyword: str, n_topics: int):
+    """
+    Topic modeling over the tweets matching a keyword query, using this worker's model cache.
+    Returns the topics, the number of tweets analyzed (0 when nothing matches), the cache
+    event and this worker's cache stats.
+    """
+    try:
+        index = _worker_index(tweets_file)
+    except Exception as e:
+        raise AnalysisError(500, f"Error loading tweets file: {str(e)}")
+    if len(index) == 0:
+        raise AnalysisError(400, "Tweets data is empty or missing 'text' column.")
+    try:
+        topics, num_tweets, cache_event = _TOPIC_MODELS.get_topics(index, keyword, n_topics)
+    except Exception as e:
+        raise AnalysisError(500, f"Error during topic modeling: {str(e)}")
+    return {
+        "topics": topics,
+        "num_tweets": num_tweets,
+        "cache_event": cache_event,
+        "cache_stats": _TOPIC_MODELS.get_stats(),
+        "worker_pid": os.getpid()
+    }
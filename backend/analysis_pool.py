@@ -0,0 +1,137 @@
+import os
+import asyncio
+import hashlib
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, Request
+
+class AnalysisError(Exception):
+    """
+    Error raised inside a worker process. Unlike HTTPException it survives
+    pickling across the process boundary; AnalysisPool turns it back into one.
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+async def wait_for_disconnect(request: Request, poll_interval: float = 0.5):
+    """Returns once the client of `request` has gone away."""
+    while not await request.is_disconnected():
+        await asyncio.sleep(poll_interval)
+
+class AnalysisPool:
+    """
+    Shared process pool for CPU-bound analysis endpoints.
+
+    Each worker process has its own single-process executor. Jobs that pass a
+    `key` always run on the worker that key hashes to, so per-process caches
+    (layouts, topic models) are hit on repeated requests instead of being
+    rebuilt on whichever worker happens to be free. Jobs without a key go to
+    the worker with the fewest pending jobs.
+
+    At most `max_concurrent` tasks are submitted at once; further requests wait
+    for a slot without blocking the event loop. Each task gets a timeout, and a
+    task whose client disconnects is abandoned. Tasks still queued in the pool
+    are cancelled; a task already running in a worker finishes in the background
+    and its result is discarded. Callers should pass file paths, versions and
+    parameters rather than data frames, and return small results.
+    """
+
+    def __init__(self, max_workers: int = None, max_concurrent: int = None, timeout: float = 300):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrent = max_concurrent or self.max_workers
+        self.timeout = timeout
+        self.executors = None
+        self.pending = None
+        self.semaphore = None
+
+    def _new_executor(self):
+        # spawn keeps workers independent of the server's threads and open sockets
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    def start(self):
+        if self.executors is None:
+            self.executors = [self._new_executor() for _ in range(self.max_workers)]
+            self.pending = [0] * self.max_workers
+            self.semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    def shutdown(self):
+        if self.executors is not None:
+            for executor in self.executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+            self.executors = None
+
+    def recycle(self, worker: int):
+        """
+        Replace a worker whose job was abandoned while running, so jobs routed to it
+        do not queue behind that job. The old process exits once its queue is done.
+        """
+        old = self.executors[worker]
+        self.executors[worker] = self._new_executor()
+        self.pending[worker] = 0
+        old.shutdown(wait=False)
+
+    def worker_for(self, key=None) -> int:
+        """Index of the worker a job runs on: fixed for a key, otherwise the least busy one."""
+        if key is None:
+            return min(range(len(self.executors)), key=self.pending.__getitem__)
+        digest = hashlib.sha1(repr(key).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % len(self.executors)
+
+    def _abandon(self, worker: int, executor, job):
+        """Drop a job nobody waits for: cancel it if still queued, else recycle its worker."""
+        if not job.cancel() and self.executors is not None and self.executors[worker] is executor:
+            self.recycle(worker)
+
+    async def run(self, request: Request, fn, *args, key=None, timeout: float = None, **kwargs):
+        """
+        Run fn(*args, **kwargs) in a worker process and return its result.
+        Jobs with the same `key` (any value with a stable repr) run on the same worker.
+        Raises HTTPException 504 on timeout and 499 when the client of `request` went away;
+        pass request=None for jobs not tied to a single client. A job abandoned while
+        running gets its worker replaced, so later jobs with its key are not stuck behind it.
+        """
+        self.start()
+        async with self.semaphore:
+            worker = self.worker_for(key)
+            executor = self.executors[worker]
+            self.pending[worker] += 1
+            job = executor.submit(functools.partial(fn, *args, **kwargs))
+            job.add_done_callback(lambda _: self._done(worker, executor))
+            task = asyncio.wrap_future(job)
+            # Without a request (e.g. a render shared by several clients) only the timeout applies
+            waiting = {task}
+            watcher = None
+            if request is not None:
+                watcher = asyncio.create_task(wait_for_disconnect(request))
+                waiting.add(watcher)
+            try:
+                done, _ = await asyncio.wait(
+                    waiting,
+                    timeout=timeout or self.timeout,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+            except asyncio.CancelledError:
+                self._abandon(worker, executor, job)
+                raise
+            finally:
+                if watcher is not None:
+                    watcher.cancel()
+            if task in done:
+                try:
+                    return task.result()
+                except AnalysisError as e:
+                    raise HTTPException(status_code=e.status_code, detail=e.detail)
+            self._abandon(worker, executor, job)
+            if watcher is not None and watcher in done:
+                raise HTTPException(status_code=499, detail="Client disconnected; analysis cancelled.")
+            raise HTTPException(status_code=504, detail="Analysis timed out.")
+
+    def _done(self, worker: int, executor):
+        # Runs in the executor's thread; counts of a recycled executor no longer matter
+        if self.executors is not None and self.executors[worker] is executor:
+            self.pending[worker] -= 1
@@ -1,14 +1,20 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import pandas as pd
-import whois
 import validators
 from urllib.parse import urlparse
-import requests
+import httpx
+import asyncio
+import json
 import csv
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from domain_index import DomainIndex
+from whois_cache import WhoisCache, registered_domain
+
 app = FastAPI(
     title="News Reliability Checker API",
     description="API to verify if a news URL is from a known unreliable source and return additional info.",
@@ -18,6 +24,26 @@ app = FastAPI(
 # Load your CSV file with known unreliable sources
 df = pd.read_csv(r"filtered_mbfc_fact_1.csv")
 df['Domain'] = df['Domain'].str.lower()
+# Registered domain -> subdomain trie, so edition.cnn.com is found under cnn.com
+domain_index = DomainIndex(df.to_dict(orient="records"))
+
+# Seconds each external source may take before /check_news answers without it
+SOURCE_TIMEOUTS = {"whois": 10.0, "reddit": 5.0, "facebook": 5.0, "hackernews": 5.0}
+# python-whois is blocking and has no timeout of its own, so it gets its own threads
+WHOIS_THREADS = 8
+WHOIS_EXECUTOR = ThreadPoolExecutor(max_workers=WHOIS_THREADS, thread_name_prefix="whois")
+# One per WHOIS thread; a lookup holds its slot until its thread is done with it
+WHOIS_SLOTS = asyncio.Semaphore(WHOIS_THREADS)
+# Persistent WHOIS cache by registered domain, shared with bc1's /whois
+whois_cache = WhoisCache()
+# Pooled client shared by all requests, opened at startup
+http_client = None
+# Largest number of URLs one /check_news/batch request may carry
+MAX_BATCH_URLS = 5000
+# Social media API calls per second across all batch requests
+BATCH_RATE_LIMIT = float(os.environ.get("CHECK_NEWS_RATE_LIMIT", 20))
+# URLs of one batch request checked at the same time
+BATCH_CONCURRENCY = 50
 
 class CheckNewsResponse(BaseModel):
     is_reliable: bool
@@ -26,6 +52,42 @@ class CheckNewsResponse(BaseModel):
     whois_info: dict = None
     media_details: dict = None
     social_media_stats: dict = None
+    timed_out: list = []
+
+class CheckNewsBatchRequest(BaseModel):
+    urls: list[str]
+
+class CheckNewsBatchResult(CheckNewsResponse):
+    url: str
+
+class RateLimiter:
+    """
+    Token bucket letting at most `rate` calls start per second, across all callers.
+    Callers queue in order and only take a token once one is there, so a caller
+    cancelled while waiting leaves no slot reserved behind it.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = None
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self.updated is not None:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+batch_rate_limiter = RateLimiter(BATCH_RATE_LIMIT)
 
 def extract_domain(url: str) -> str:
     """Extract the domain from the provided URL."""
@@ -35,29 +97,49 @@ def extract_domain(url: str) -> str:
         domain = domain[4:]
     return domain
 
-def get_reddit_mentions(url: str) -> int:
+@app.on_event("startup")
+async def open_http_client():
+    global http_client
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        follow_redirects=True
+    )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await http_client.aclose()
+    WHOIS_EXECUTOR.shutdown(wait=False)
+
+def get_whois_info(url: str) -> dict:
+    """WHOIS record of the URL's registered domain with values as strings (blocking on a cache miss)."""
+    try:
+        whois_info = whois_cache.get(url)
+        return {k: str(v) for k, v in whois_info.items()}
+    except Exception as e:
+        return {"error": f"Could not retrieve WHOIS info: {str(e)}"}
+
+async def get_reddit_mentions(url: str) -> int:
     """Retrieve the number of Reddit posts mentioning the URL."""
-    endpoint = f"https://www.reddit.com/api/info.json?url={url}"
+    endpoint = "https://www.reddit.com/api/info.json"
     headers = {'User-agent': 'Mozilla/5.0'}
     try:
-        response = requests.get(endpoint, headers=headers)
+        response = await http_client.get(endpoint, params={"url": url}, headers=headers)
         response.raise_for_status()
         data = response.json()
-        print(data)
         posts = data.get('data', {}).get('children', [])
         return len(posts)
     except Exception as e:
         print(f"Error retrieving Reddit mentions: {e}")
         return 0
 
-def get_facebook_shares(url: str) -> int:
+async def get_facebook_shares(url: str) -> int:
     """
     Retrieve the number of Facebook shares using the Graph API.
     Note: This endpoint (https://graph.facebook.com) may require an access token in the future.
     """
-    endpoint = f"https://graph.facebook.com/?id={url}"
+    endpoint = "https://graph.facebook.com/"
     try:
-        response = requests.get(endpoint)
+        response = await http_client.get(endpoint, params={"id": url})
         response.raise_for_status()
         data = response.json()
         share_info = data.get("share", {})
@@ -66,14 +148,14 @@ def get_facebook_shares(url: str) -> int:
         print(f"Error retrieving Facebook shares: {e}")
         return 0
 
-def get_hackernews_mentions(url: str) -> int:
+async def get_hackernews_mentions(url: str) -> int:
     """
     Retrieve the number of Hacker News posts mentioning the URL.
     Uses the Algolia Hacker News API.
     """
-    endpoint = f"https://hn.algolia.com/api/v1/search?query={url}&restrictSearchableAttributes=url"
+    endpoint = "https://hn.algolia.com/api/v1/search"
     try:
-        response = requests.get(endpoint)
+        response = await http_client.get(endpoint, params={"query": url, "restrictSearchableAttributes": "url"})
         response.raise_for_status()
         data = response.json()
         hits = data.get("hits", [])
@@ -82,6 +164,54 @@ def get_hackernews_mentions(url: str) -> int:
         print(f"Error retrieving Hacker News mentions: {e}")
         return 0
 
+async def with_timeout(source: str, awaitable, timed_out: list):
+    """Result of one source, or None (and the source noted in `timed_out`) if it took too long."""
+    try:
+        return await asyncio.wait_for(awaitable, SOURCE_TIMEOUTS[source])
+    except asyncio.TimeoutError:
+        timed_out.append(source)
+        return None
+
+async def lookup_whois(url: str, timed_out: list):
+    """
+    WHOIS info of a URL's domain from the shared cache, under the WHOIS timeout.
+    The timeout starts once a WHOIS thread is free, so waiting behind other lookups does not count.
+    """
+    await WHOIS_SLOTS.acquire()
+    lookup = asyncio.get_running_loop().run_in_executor(WHOIS_EXECUTOR, get_whois_info, url)
+    # A timed out lookup keeps its thread busy until it returns, so the slot is freed only then
+    lookup.add_done_callback(lambda _: WHOIS_SLOTS.release())
+    return await with_timeout("whois", asyncio.shield(lookup), timed_out)
+
+async def lookup_social(url: str, timed_out: list, limiter: RateLimiter = None):
+    """
+    (reddit, facebook, hackernews) counts of a URL, fetched concurrently, each under its own
+    timeout; timed out values are None. With a limiter, each call first waits for a slot.
+    """
+    async def fetch(source, get_count):
+        if limiter is not None:
+            await limiter.wait()
+        return await with_timeout(source, get_count(url), timed_out)
+
+    return await asyncio.gather(
+        fetch("reddit", get_reddit_mentions),
+        fetch("facebook", get_facebook_shares),
+        fetch("hackernews", get_hackernews_mentions)
+    )
+
+def assess_reliability(url: str):
+    """(is_reliable, message, media_details) of a URL from the MBFC domain index."""
+    match = domain_index.lookup(url)
+    if match is None:
+        return True, "No flagged misinformation detected.", {}
+    return False, "This website is in the list of known unreliable sources.", {
+        "Name": match['Name'],
+        "MBFC Fact": match['MBFC Fact'],
+        "MBFC Bias": match['MBFC Bias'],
+        "Media Bias/Fact Check": match['Media Bias/Fact Check'],
+        "Matched Domain": match['Domain'],
+    }
+
 def save_social_media_data_to_csv(url: str, reddit: int, facebook: int, hn: int):
     """
     Save the fetched social media data to a CSV file dynamically.
@@ -97,51 +227,28 @@ def save_social_media_data_to_csv(url: str, reddit: int, facebook: int, hn: int)
         writer.writerow([url, reddit, facebook, hn, timestamp])
 
 @app.get("/check_news", response_model=CheckNewsResponse)
-def check_news(url: str):
+async def check_news(url: str):
     """
     Check the reliability of a given news article URL.
     Steps:
       1. Validate the URL.
       2. Extract the domain.
-      3. Check the domain against the known unreliable sources dataset.
-      4. Retrieve WHOIS info for additional domain data.
-      5. Retrieve social media stats (Reddit, Facebook, Hacker News).
-      6. Save the social media stats to CSV.
+      3. Check the domain, its parent domains and the path against the known unreliable sources.
+      4. Retrieve WHOIS info and social media stats (Reddit, Facebook, Hacker News) concurrently.
+         A source that does not answer within its timeout is left out and listed in timed_out.
+      5. Save the social media stats to CSV.
     """
     # Validate URL
     if not validators.url(url):
         raise HTTPException(status_code=400, detail="Invalid URL provided.")
     
     domain = extract_domain(url)
-    match = df[df['Domain'] == domain]
-   
-    try:
-        whois_info = whois.whois(url)
-        if isinstance(whois_info, dict):
-            whois_info = {k: str(v) for k, v in whois_info.items() if v is not None}
-        else:
-            whois_info = {}
-    except Exception as e:
-        whois_info = {"error": f"Could not retrieve WHOIS info: {str(e)}"}
-    
-    if not match.empty:
-        message = "This website is in the list of known unreliable sources."
-        is_reliable = False
-        media_details = {
-            "Name": match.iloc[0]['Name'],
-            "MBFC Fact": match.iloc[0]['MBFC Fact'],
-            "MBFC Bias": match.iloc[0]['MBFC Bias'],
-            "Media Bias/Fact Check": match.iloc[0]['Media Bias/Fact Check'],
-        }
-    else:
-        message = "No flagged misinformation detected."
-        is_reliable = True
-        media_details = {}
-    
-    # Retrieve social media metrics
-    reddit_mentions = get_reddit_mentions(url)
-    facebook_shares = get_facebook_shares(url)
-    hackernews_mentions = get_hackernews_mentions(url)
+    is_reliable, message, media_details = assess_reliability(url)
+    timed_out = []
+    whois_info, (reddit_mentions, facebook_shares, hackernews_mentions) = await asyncio.gather(
+        lookup_whois(url, timed_out),
+        lookup_social(url, timed_out)
+    )
     
     # Save all metrics to CSV
     save_social_media_data_to_csv(url, reddit_mentions, facebook_shares, hackernews_mentions)
@@ -158,9 +265,96 @@ def check_news(url: str):
         domain=domain,
         whois_info=whois_info,
         media_details=media_details,
-        social_media_stats=social_media_stats
+        social_media_stats=social_media_stats,
+        timed_out=timed_out
     )
 
+@app.post("/check_news/batch")
+async def check_news_batch(request: CheckNewsBatchRequest):
+    """
+    Check many URLs (e.g. the extracted_urls of tweets) in one request.
+    URLs are deduplicated and grouped by registered domain: WHOIS and reliability (from the
+    in-memory MBFC index) are resolved once per domain, and social media stats are
+    fetched per URL, BATCH_CONCURRENCY at a time and under a rate limit shared by all batch requests.
+    Results stream back as NDJSON, one line per distinct URL in the order they complete,
+    with the same fields as /check_news plus url; invalid URLs get a line with an error.
+    """
+    urls = list(dict.fromkeys(request.urls))
+    if len(urls) > MAX_BATCH_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_URLS} URLs per batch.")
+    invalid = [url for url in urls if not validators.url(url)]
+    by_domain = {}
+    for url in urls:
+        if validators.url(url):
+            by_domain.setdefault(registered_domain(url), []).append(url)
+
+    async def domain_whois(url):
+        timed_out = []
+        whois_info = await lookup_whois(url, timed_out)
+        return whois_info, timed_out
+
+    reliability = {}
+
+    def domain_reliability(url):
+        # Once per registered domain, unless the list has subdomain or path entries under it
+        key = domain_index.resolution_key(url)
+        if key not in reliability:
+            reliability[key] = assess_reliability(url)
+        return reliability[key]
+
+    async def check_one(url, whois_task):
+        timed_out = []
+        (whois_info, whois_timed_out), (reddit_mentions, facebook_shares, hackernews_mentions) = await asyncio.gather(
+            asyncio.shield(whois_task),
+            lookup_social(url, timed_out, batch_rate_limiter)
+        )
+        save_social_media_data_to_csv(url, reddit_mentions, facebook_shares, hackernews_mentions)
+        is_reliable, message, media_details = domain_reliability(url)
+        return CheckNewsBatchResult(
+            url=url,
+            is_reliable=is_reliable,
+            message=message,
+            domain=extract_domain(url),
+            whois_info=whois_info,
+            media_details=media_details,
+            social_media_stats={"reddit_mentions": reddit_mentions, "hackernews_mentions": hackernews_mentions},
+            timed_out=whois_timed_out + timed_out
+        )
+
+    async def result_line(url, whois_task):
+        try:
+            result = await check_one(url, whois_task)
+        except Exception as e:
+            # One failing URL gets an error line instead of ending the stream
+            return json.dumps({"url": url, "error": f"Check failed: {str(e)}"})
+        return result.model_dump_json()
+
+    async def results():
+        for url in invalid:
+            yield json.dumps({"url": url, "error": "Invalid URL provided."}) + "\n"
+        queued = [(domain, url) for domain, domain_urls in by_domain.items() for url in domain_urls]
+        pending = iter(queued)
+        whois_tasks = {}
+        lines = asyncio.Queue(maxsize=BATCH_CONCURRENCY)
+
+        async def check_worker():
+            # Each worker takes the next URL once it is done with the previous one
+            for domain, url in pending:
+                if domain not in whois_tasks:
+                    whois_tasks[domain] = asyncio.ensure_future(domain_whois(url))
+                await lines.put(await result_line(url, whois_tasks[domain]))
+
+        workers = [asyncio.ensure_future(check_worker()) for _ in range(min(BATCH_CONCURRENCY, len(queued)))]
+        try:
+            for _ in queued:
+                yield await lines.get() + "\n"
+        finally:
+            # The client went away or everything is done; stop what is still running
+            for task in [*workers, *whois_tasks.values()]:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
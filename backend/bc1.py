@@ -1,14 +1,19 @@
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 import tldextract
-import whois
 from datetime import datetime
 
+from whois_cache import WhoisCache, parse_date
+
 app = FastAPI(
     title="News Reliability Checker API",
     description="API to fetch WHOIS data and check reliability.",
     version="1.0.0"
 )
 
+# Persistent WHOIS cache shared with the /check_news API
+whois_cache = WhoisCache()
+
 def extract_domain(url: str) -> str:
     """Extract the domain from a URL."""
     try:
@@ -25,21 +30,15 @@ async def get_whois(url: str):
         return {"error": "Invalid URL format"}
     
     try:
-        w = whois.whois(url)
-        creation_date = w.creation_date
-        expiration_date = w.expiration_date
-        registrar = w.registrar
-        
-        # Handle lists in dates
-        if isinstance(creation_date, list):
-            creation_date = creation_date[0]
-        if isinstance(expiration_date, list):
-            expiration_date = expiration_date[0]
+        w = await run_in_threadpool(whois_cache.get, url)
+        creation_date = parse_date(w.get("creation_date"))
+        expiration_date = parse_date(w.get("expiration_date"))
+        registrar = w.get("registrar")
         
         # Calculate domain age
         domain_age = None
-        if creation_date and isinstance(creation_date, datetime):
-            domain_age = (datetime.now() - creation_date).days / 365.25
+        if creation_date:
+            domain_age = (datetime.now(creation_date.tzinfo) - creation_date).days / 365.25
         
         return {
             "domain": domain,
@@ -0,0 +1,284 @@
+import os
+import re
+import ast
+import json
+import hashlib
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import scipy.sparse as sp
+import seaborn as sns
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.spatial.distance import pdist
+from sklearn.linear_model import LinearRegression
+from wordcloud import WordCloud
+
+# Chart rendering shared by the enrichment pipeline and the /visualizations endpoint.
+# Every chart is a function (df, output_file, **params) registered in CHARTS; the
+# endpoint renders on demand in the analysis pool and caches the PNG by dataset
+# version and parameters.
+
+CHART_CACHE_DIR = "chart_cache"
+LIST_COLUMNS = ("keywords", "keyword_sentiments", "extracted_locations", "mentioned_users", "location_coordinates")
+NP_SCALAR_RE = re.compile(r"np\.\w+\(([^()]*)\)")
+
+#########################################
+# ----------- Dataset Loading --------- #
+#########################################
+
+def parse_list(value):
+    """A list column as written to analyzed_tweets.csv ("[('ww3', np.float64(1.0))]") back to a list."""
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str) or not value.startswith("["):
+        return []
+    try:
+        return ast.literal_eval(NP_SCALAR_RE.sub(r"\1", value))
+    except (ValueError, SyntaxError):
+        return []
+
+def load_dataset(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    for column in LIST_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].apply(parse_list)
+    if 'timestamp' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce', utc=True)
+    return df
+
+def dataset_version(path: str) -> str:
+    """Changes whenever the dataset file is rewritten or appended to."""
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+#########################################
+# ------------- Charts ---------------- #
+#########################################
+
+def _save(output_file: str):
+    plt.tight_layout()
+    plt.savefig(output_file)
+    plt.close()
+
+def render_wordcloud(df, output_file, max_words: int = 200):
+    word_freq = {}
+    for tweet_keywords in df['keywords']:
+        for word, score in tweet_keywords:
+            word_freq[word] = word_freq.get(word, 0) + score
+    plt.figure(figsize=(10, 5))
+    if word_freq:
+        wc = WordCloud(width=800, height=400, background_color='white', max_words=max_words)
+        plt.imshow(wc.generate_from_frequencies(word_freq), interpolation='bilinear')
+    plt.axis('off')
+    _save(output_file)
+
+def keyword_matrix(keyword_lists):
+    """Binary tweets x terms CSR matrix of the keywords each tweet contains, plus the term list."""
+    vocabulary = {}
+    indices, indptr = [], [0]
+    for keywords in keyword_lists:
+        columns = {vocabulary.setdefault(term, len(vocabulary)) for term in keywords}
+        indices.extend(columns)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int32)
+    matrix = sp.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(vocabulary)))
+    return matrix, list(vocabulary)
+
+def cooccurrence_matrix(keyword_lists, top_k: int = 50):
+    """
+    Dense co-occurrence counts between the `top_k` most frequent keywords, from one
+    sparse product XᵀX of the binary tweet x keyword matrix. The diagonal (a term
+    with itself) is zeroed. Returns (terms, matrix).
+    """
+    X, terms = keyword_matrix(keyword_lists)
+    if not terms:
+        return [], np.zeros((0, 0))
+    frequency = np.asarray(X.sum(axis=0)).ravel()
+    keep = np.argsort(-frequency, kind="stable")[:top_k]
+    X = X[:, keep]
+    counts = (X.T @ X).toarray().astype(float)
+    np.fill_diagonal(counts, 0)
+    return [terms[i] for i in keep], counts
+
+def cluster_order(counts):
+    """Leaf order of an average-linkage clustering of the rows, so related terms sit together."""
+    if len(counts) < 3:
+        return np.arange(len(counts))
+    profiles = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+    distances = np.nan_to_num(pdist(profiles, metric="cosine"), nan=1.0)
+    return leaves_list(linkage(distances, method="average"))
+
+def render_cooccurrence_heatmap(df, output_file, top_k: int = 50, cluster: bool = True):
+    """Co-occurrence of the most frequent keywords, clustered so related terms are adjacent."""
+    terms, cooccurrence = cooccurrence_matrix(
+        ([kw for kw, _ in kw_list] for kw_list in df['keywords']), top_k=top_k
+    )
+    if cluster:
+        order = cluster_order(cooccurrence)
+        terms = [terms[i] for i in order]
+        cooccurrence = cooccurrence[np.ix_(order, order)]
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(cooccurrence, xticklabels=terms, yticklabels=terms, cmap='Blues')
+    plt.title('Keyword Co-occurrence Heatmap')
+    _save(output_file)
+
+def render_sentiment_trend(df, output_file):
+    """Linear trend of tweet sentiment over the tweet sequence."""
+    X = np.arange(len(df)).reshape(-1, 1)
+    Y = df['sentence_sentiment'].fillna(0).values.reshape(-1, 1)
+    plt.figure(figsize=(10, 6))
+    plt.scatter(X, Y, label='Data', alpha=0.5)
+    if len(df) > 1:
+        plt.plot(X, LinearRegression().fit(X, Y).predict(X), color='red', label='Trend line')
+    plt.title('Tweet Sentiment Trend')
+    plt.xlabel("Tweet Index (Numeric Sequence)")
+    plt.ylabel('sentence_sentiment')
+    plt.legend()
+    _save(output_file)
+
+def render_daily_tweet_count_trend(df, output_file):
+    """Daily tweet count with a linear trend."""
+    dated = df.dropna(subset=['timestamp'])
+    tweet_count = dated.groupby(dated['timestamp'].dt.date).size()
+    X = np.arange(len(tweet_count)).reshape(-1, 1)
+    Y = tweet_count.values.reshape(-1, 1)
+    plt.figure(figsize=(10, 6))
+    plt.scatter(tweet_count.index, Y, label='Daily Tweet Count', alpha=0.5)
+    if len(tweet_count) > 1:
+        plt.plot(tweet_count.index, LinearRegression().fit(X, Y).predict(X), color='red', label='Trend Line')
+    plt.title('Daily Tweet Count with Trend Line')
+    plt.xlabel('Date')
+    plt.ylabel('Tweet Count')
+    plt.xticks(rotation=45)
+    plt.legend()
+    _save(output_file)
+
+def render_top_languages(df, output_file):
+    plt.figure(figsize=(10, 6))
+    df['language_code'].value_counts().plot(kind='bar')
+    plt.title('Top Languages')
+    plt.xlabel('Language Code')
+    plt.ylabel('Count')
+    _save(output_file)
+
+def render_top_mentions(df, output_file, top_n: int = 10):
+    mention_counts = df['mentioned_users'].explode().dropna().value_counts().head(top_n)
+    plt.figure(figsize=(10, 6))
+    if not mention_counts.empty:
+        mention_counts.plot(kind='bar')
+    plt.title('Top Mentioned Users')
+    plt.xlabel('Username')
+    plt.ylabel('Count')
+    _save(output_file)
+
+def render_political_distribution(df, output_file):
+    plt.figure(figsize=(10, 6))
+    df['political_inclination'].value_counts().plot(kind='pie', autopct='%1.1f%%')
+    plt.title('Political Inclination Distribution')
+    _save(output_file)
+
+def render_sentiment_vs_politics(df, output_file):
+    plt.figure(figsize=(10, 6))
+    colors = {'left-leaning': 'blue', 'right-leaning': 'red', 'neutral': 'green'}
+    for inclination, color in colors.items():
+        subset = df[df['political_inclination'] == inclination]
+        plt.scatter(subset.index, subset['sentence_sentiment'], c=color, label=inclination, alpha=0.6)
+    plt.title('Sentiment vs Political Inclination')
+    plt.xlabel('Tweet Index (Time Ordered)')
+    plt.ylabel('Sentiment Score')
+    plt.legend()
+    plt.grid(True)
+    _save(output_file)
+
+# viz_name -> (render function, default parameters). A new chart is one more entry.
+CHARTS = {
+    "wordcloud": (render_wordcloud, {"max_words": 200}),
+    "cooccurrence_heatmap": (render_cooccurrence_heatmap, {"top_k": 50, "cluster": True}),
+    "sentiment_trend": (render_sentiment_trend, {}),
+    "daily_tweet_count_trend": (render_daily_tweet_count_trend, {}),
+    "top_languages": (render_top_languages, {}),
+    "top_mentions": (render_top_mentions, {"top_n": 10}),
+    "political_distribution": (render_political_distribution, {}),
+    "sentiment_vs_politics": (render_sentiment_vs_politics, {})
+}
+
+#########################################
+# ----------- Render Service ---------- #
+#########################################
+
+def chart_params(viz_name: str, overrides: dict = None) -> dict:
+    """
+    Defaults of a chart updated with the given overrides, coerced to the defaults' types.
+    Raises ValueError for unknown parameters, values that do not convert and counts below 1.
+    """
+    _, defaults = CHARTS[viz_name]
+    params = dict(defaults)
+    for key, value in (overrides or {}).items():
+        if key not in defaults:
+            raise ValueError(f"Unknown parameter '{key}' for {viz_name}. Expected one of: {', '.join(defaults) or 'none'}.")
+        if isinstance(defaults[key], bool):
+            flag = str(value).lower()
+            if flag not in ("1", "true", "yes", "0", "false", "no"):
+                raise ValueError(f"Parameter '{key}' of {viz_name} must be true or false, got '{value}'.")
+            params[key] = flag in ("1", "true", "yes")
+            continue
+        try:
+            params[key] = type(defaults[key])(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameter '{key}' of {viz_name} must be {type(defaults[key]).__name__}, got '{value}'.")
+        # Integer chart parameters are all counts (top_k, top_n, max_words)
+        if isinstance(params[key], int) and params[key] < 1:
+            raise ValueError(f"Parameter '{key}' of {viz_name} must be at least 1, got {params[key]}.")
+    return params
+
+def chart_path(dataset_file: str, viz_name: str, params: dict, cache_dir: str = CHART_CACHE_DIR) -> str:
+    """Cache location of a chart for the current dataset version and these parameters."""
+    version = dataset_version(dataset_file)
+    key = json.dumps([os.path.abspath(dataset_file), version, viz_name, params], sort_keys=True)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{viz_name}-{version.replace('-', '_')}-{digest}.png")
+
+_DATASETS = {}
+
+def _worker_dataset(dataset_file: str) -> pd.DataFrame:
+    """This worker's parsed copy of the dataset, reloaded when the file changes."""
+    path = os.path.abspath(dataset_file)
+    version = dataset_version(path)
+    cached = _DATASETS.get(path)
+    if cached is None or cached[0] != version:
+        cached = (version, load_dataset(path))
+        _DATASETS[path] = cached
+    return cached[1]
+
+def render_chart_job(dataset_file: str, viz_name: str, params: dict, cache_dir: str = CHART_CACHE_DIR) -> str:
+    """
+    Render one chart into the cache (runs in an analysis worker) and return its path.
+    Renders of the same chart for older dataset versions are removed.
+    """
+    output_file = chart_path(dataset_file, viz_name, params, cache_dir)
+    if os.path.exists(output_file):
+        return output_file
+    os.makedirs(cache_dir, exist_ok=True)
+    render, _ = CHARTS[viz_name]
+    tmp_file = f"{output_file}.{os.getpid()}.tmp.png"
+    # Imported here so the pipeline can use the charts without the API's dependencies
+    from analysis_pool import AnalysisError
+    try:
+        render(_worker_dataset(dataset_file), tmp_file, **params)
+    except Exception as e:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        # Every client sharing this render gets the reason, not a bare 500
+        raise AnalysisError(500, f"Error rendering {viz_name}: {str(e)}")
+    os.replace(tmp_file, output_file)
+    current = os.path.basename(output_file).rsplit("-", 1)[0]
+    for name in os.listdir(cache_dir):
+        if name.startswith(f"{viz_name}-") and name.endswith(".png") and not name.startswith(f"{current}-"):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+    return output_file
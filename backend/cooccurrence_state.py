@@ -0,0 +1,251 @@
+import os
+import pickle
+import hashlib
+import threading
+from collections import Counter, defaultdict
+
+import networkx as nx
+import pandas as pd
+
+from csv_tail import CsvTail
+from tweet_tokenizer import content_terms, tokenize
+
+STATE_FORMAT_VERSION = 4
+# Persisted states live here rather than next to the tweets files
+STATE_DIR = "cooccurrence_cache"
+
+def state_file_for(tweets_file: str, state_dir: str = STATE_DIR) -> str:
+    """Path of the persisted state of a tweets file: a hash of its absolute path inside state_dir."""
+    digest = hashlib.sha1(os.path.abspath(tweets_file).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(state_dir, f"{digest}.cooccurrence.pkl")
+
+STOP_WORDS = frozenset({'a', 'an', 'the', 'and', 'or', 'but', 'if', 'in', 'on', 'at', 'to', 'for', 'with',
+                        'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do',
+                        'does', 'did', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'this', 'that', 'of',
+                        'from', 'by', 'my', 'your', 'his', 'her', 'its', 'our', 'their'})
+
+def preprocess_text(text: str):
+    """
+    Preprocess tweet text to extract meaningful terms.
+    URLs and mentions are dropped; hashtags count as their word.
+    """
+    return content_terms(tokenize(text), stop_words=STOP_WORDS, min_length=3)
+
+class CooccurrenceCounts:
+    """
+    Term frequencies plus symmetric pair counts for a set of tweets.
+    pairs[a][b] is the number of times a and b appear together in a tweet,
+    counted the same way as the original per-request graph build (every
+    i < j position pair, including repeated terms).
+    """
+
+    def __init__(self, tokenize):
+        self.tokenize = tokenize
+        self.term_counts = Counter()
+        self.pairs = defaultdict(Counter)
+        self.num_tweets = 0
+
+    def _apply(self, terms, sign: int):
+        for term in terms:
+            self.term_counts[term] += sign
+        for i in range(len(terms)):
+            for j in range(i + 1, len(terms)):
+                term1, term2 = terms[i], terms[j]
+                self.pairs[term1][term2] += sign
+                if term1 != term2:
+                    self.pairs[term2][term1] += sign
+        self.num_tweets += sign
+
+    def add_terms(self, terms):
+        self._apply(terms, 1)
+
+    def remove_terms(self, terms):
+        """Subtract a tweet previously added with add_terms and drop zeroed entries."""
+        self._apply(terms, -1)
+        for term in set(terms):
+            if self.term_counts[term] <= 0:
+                del self.term_counts[term]
+            neighbours = self.pairs.get(term)
+            if neighbours is None:
+                continue
+            for other in [o for o, c in neighbours.items() if c <= 0]:
+                del neighbours[other]
+            if not neighbours:
+                del self.pairs[term]
+
+    def add_text(self, text):
+        if isinstance(text, str):
+            self.add_terms(self.tokenize(text))
+
+    def key_terms(self, min_count: int = 2, max_terms: int = 500):
+        """
+        Most frequent terms with at least `min_count` occurrences, capped at `max_terms`.
+        """
+        ranked = self.term_counts.most_common()
+        key_terms = {}
+        for term, count in ranked:
+            if count < min_count or len(key_terms) >= max_terms:
+                break
+            key_terms[term] = count
+        return key_terms
+
+    def top_edges(self, key_terms, min_edge_weight: int = 2):
+        """
+        Edges between the given key terms with at least `min_edge_weight` co-occurrences, as (term1, term2, weight).
+        """
+        edges = []
+        for term1 in key_terms:
+            for term2, weight in self.pairs.get(term1, {}).items():
+                if term2 in key_terms and weight >= min_edge_weight and term1 <= term2:
+                    edges.append((term1, term2, weight))
+        return edges
+
+    def build_graph(self, min_term_count: int = 2, max_terms: int = 200, min_edge_weight: int = 2):
+        """
+        Build the co-occurrence graph from the maintained counts.
+        Cost depends on the selected terms and their neighbourhoods, not on the number of tweets.
+        """
+        key_terms = self.key_terms(min_count=min_term_count, max_terms=max_terms)
+        G = nx.Graph()
+        for term1, term2, weight in self.top_edges(key_terms, min_edge_weight=min_edge_weight):
+            G.add_node(term1, count=key_terms[term1])
+            G.add_node(term2, count=key_terms[term2])
+            G.add_edge(term1, term2, weight=weight)
+        return G
+
+class CooccurrenceState(CooccurrenceCounts):
+    """
+    Co-occurrence counts for a tweets CSV, persisted in STATE_DIR and kept up to
+    date by reading only the rows appended since the last sync.
+    """
+
+    def __init__(self, tweets_file: str, tokenize, state_file: str = None):
+        super().__init__(tokenize)
+        self.tweets_file = tweets_file
+        self.state_file = state_file or state_file_for(tweets_file)
+        self.tail = CsvTail(tweets_file)
+        self.version = 0
+        self.lock = threading.RLock()
+
+    @classmethod
+    def load(cls, tweets_file: str, tokenize, state_file: str = None):
+        """Load the persisted state if there is one, otherwise start empty."""
+        state = cls(tweets_file, tokenize, state_file=state_file)
+        if os.path.exists(state.state_file):
+            try:
+                with open(state.state_file, "rb") as f:
+                    data = pickle.load(f)
+                if data.get("format") == STATE_FORMAT_VERSION:
+                    state.term_counts = data["term_counts"]
+                    state.pairs = data["pairs"]
+                    state.num_tweets = data["num_tweets"]
+                    state.tail.set_position(data["tail"])
+                    state.version = data["version"]
+            except Exception:
+                state.reset()
+        return state
+
+    def save(self):
+        """Write the state atomically so a crash never leaves a torn file."""
+        with self.lock:
+            data = {
+                "format": STATE_FORMAT_VERSION,
+                "term_counts": self.term_counts,
+                "pairs": self.pairs,
+                "num_tweets": self.num_tweets,
+                "tail": self.tail.get_position(),
+                "version": self.version
+            }
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.state_file)
+
+    def reset(self):
+        with self.lock:
+            self.term_counts = Counter()
+            self.pairs = defaultdict(Counter)
+            self.num_tweets = 0
+            self.tail = CsvTail(self.tweets_file)
+            self.version += 1
+
+    def sync(self) -> int:
+        """
+        Fold tweets appended to the CSV since the last sync into the counts.
+        Starts over if the file was truncated or rewritten. Returns the number of new tweets.
+        """
+        with self.lock:
+            rows, rewritten = self.tail.read()
+            if rewritten:
+                position = self.tail.get_position()
+                self.reset()
+                self.tail.set_position(position)
+            for row in rows:
+                self.add_text(row.get("text"))
+            if rows or rewritten:
+                self.version += 1
+            return len(rows)
+
+    def rebuild(self):
+        """Recompute the counts from the raw CSV."""
+        with self.lock:
+            self.reset()
+            self.sync()
+            self.save()
+
+def sliding_window_cooccurrence(
+    df: pd.DataFrame,
+    tokenize,
+    window=None,
+    step=None,
+    start=None,
+    end=None,
+    max_windows: int = 500
+):
+    """
+    Yield (window_start, window_end, counts) over the `timestamp` column of `df`.
+
+    With only `start`/`end` a single window is produced. With `window` (and an
+    optional `step`, defaulting to `window`) windows of that length slide from
+    `start` to `end`. Counts are updated incrementally: tweets entering the
+    window are added and tweets leaving it are subtracted, so each tweet is
+    tokenized once and touched at most twice regardless of the number of windows.
+    The yielded counts object is reused between windows; read it before advancing.
+    """
+    timestamps = pd.to_datetime(df['timestamp'], errors='coerce', utc=True)
+    frame = pd.DataFrame({"timestamp": timestamps, "text": df['text']}).dropna(subset=["timestamp"])
+    frame = frame.sort_values("timestamp", kind="stable")
+    if frame.empty:
+        return
+    times = frame['timestamp'].tolist()
+    terms = [tokenize(text) if isinstance(text, str) else [] for text in frame['text']]
+    start = pd.Timestamp(start) if start is not None else times[0]
+    end = pd.Timestamp(end) if end is not None else times[-1] + pd.Timedelta(microseconds=1)
+    if start.tzinfo is None:
+        start = start.tz_localize("UTC")
+    if end.tzinfo is None:
+        end = end.tz_localize("UTC")
+    window = pd.Timedelta(window) if window is not None else end - start
+    step = pd.Timedelta(step) if step is not None else window
+    if window <= pd.Timedelta(0) or step <= pd.Timedelta(0):
+        raise ValueError("window and step must be positive")
+
+    counts = CooccurrenceCounts(tokenize)
+    lo = hi = 0
+    n = len(times)
+    window_start = start
+    produced = 0
+    while window_start < end and produced < max_windows:
+        window_end = min(window_start + window, end)
+        while lo < n and times[lo] < window_start:
+            if lo < hi:
+                counts.remove_terms(terms[lo])
+            lo += 1
+        hi = max(hi, lo)
+        while hi < n and times[hi] < window_end:
+            counts.add_terms(terms[hi])
+            hi += 1
+        yield window_start, window_end, counts
+        produced += 1
+        window_start = window_start + step
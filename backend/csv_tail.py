@@ -0,0 +1,95 @@
+import os
+import csv
+import io
+import hashlib
+
+# Number of leading bytes hashed to notice when a CSV file has been rewritten
+# rather than appended to.
+HEAD_BYTES = 4096
+
+def file_head_digest(path: str, length: int = HEAD_BYTES):
+    """
+    Hash of the first `length` bytes of a file, used to detect rewrites.
+    Returns (digest, number of bytes hashed), which is less than `length` for short files.
+    """
+    with open(path, "rb") as f:
+        head = f.read(length)
+    return hashlib.sha1(head).hexdigest(), len(head)
+
+def _last_record_end(data: bytes) -> int:
+    """
+    Return the index just past the last complete CSV record in `data`, or 0.
+    A newline only ends a record when it is not inside a quoted field, which
+    is the case when the number of quote characters before it is even.
+    """
+    end = 0
+    quotes = 0
+    pos = 0
+    while True:
+        newline = data.find(b"\n", pos)
+        if newline < 0:
+            return end
+        quotes += data.count(b'"', pos, newline)
+        if quotes % 2 == 0:
+            end = newline + 1
+        pos = newline + 1
+
+def read_header(path: str):
+    """Return the header row of a CSV file and the byte offset of the first record."""
+    with open(path, "rb") as f:
+        first = f.readline()
+    header = next(csv.reader(io.StringIO(first.decode("utf-8-sig"), newline="")), [])
+    return header, len(first)
+
+def read_new_rows(path: str, offset: int = 0):
+    """
+    Read the complete CSV records appended to `path` after byte `offset`.
+    A partially written trailing record is left for the next call.
+    Returns (rows as dicts, new offset).
+    """
+    header, data_start = read_header(path)
+    offset = max(offset, data_start)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = _last_record_end(data)
+    if end == 0:
+        return [], offset
+    text = data[:end].decode("utf-8", errors="replace")
+    rows = [dict(zip(header, row)) for row in csv.reader(io.StringIO(text, newline=""))
+            if len(row) == len(header)]
+    return rows, offset + end
+
+class CsvTail:
+    """
+    Follows an append-only CSV file, returning only the records added since the last read.
+    A truncated or rewritten file (detected by size and a hash of its first bytes)
+    is reported so callers can start over from the beginning.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.head_digest = None
+        self.head_length = 0
+
+    def read(self):
+        """Return (new rows, rewritten). When rewritten is True the rows start from the top of the file."""
+        rewritten = os.path.getsize(self.path) < self.offset
+        if self.head_digest is not None and not rewritten:
+            rewritten = file_head_digest(self.path, self.head_length)[0] != self.head_digest
+        if rewritten:
+            self.offset = 0
+            self.head_length = 0
+        if self.head_length < HEAD_BYTES:
+            self.head_digest, self.head_length = file_head_digest(self.path)
+        rows, self.offset = read_new_rows(self.path, self.offset)
+        return rows, rewritten
+
+    def get_position(self):
+        return {"offset": self.offset, "head_digest": self.head_digest, "head_length": self.head_length}
+
+    def set_position(self, position):
+        self.offset = position["offset"]
+        self.head_digest = position["head_digest"]
+        self.head_length = position["head_length"]
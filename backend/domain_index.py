@@ -0,0 +1,104 @@
+from urllib.parse import urlparse
+
+import tldextract
+
+# The bundled public suffix snapshot, so building the index never goes to the network
+EXTRACT = tldextract.TLDExtract(suffix_list_urls=())
+
+def split_site(site: str):
+    """
+    (host, path) of a URL or of a list entry such as "mrctv.org/cnsnews", lowercased,
+    without the port, a leading "www." or a trailing slash.
+    """
+    site = site.strip().lower()
+    parsed = urlparse(site if "://" in site else f"//{site}")
+    host = (parsed.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    return host, parsed.path.rstrip("/")
+
+def registered_parts(host: str):
+    """(registered domain, subdomain labels from the top down) of a host, e.g. ("cnn.com", ["edition"])."""
+    extracted = EXTRACT(host)
+    if not extracted.domain or not extracted.suffix:
+        # IP addresses, localhost and the like index as themselves
+        return host, []
+    registered = f"{extracted.domain}.{extracted.suffix}"
+    labels = extracted.subdomain.split(".") if extracted.subdomain else []
+    return registered, labels[::-1]
+
+class _Node:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children = {}
+        # (path prefix, record), longest prefix first; "" matches any path
+        self.entries = []
+
+class DomainIndex:
+    """
+    Sites of a source list keyed by registered domain, each with a small trie of
+    subdomain labels below it. A lookup is one hash lookup plus a walk down the
+    labels of the URL's subdomain, so it does not depend on the size of the list.
+
+    The most specific entry wins: "edition.cnn.com/politics" matches an entry for
+    "cnn.com", while an entry for "dailycitizen.focusonthefamily.com" or for
+    "mrctv.org/cnsnews" only matches that subdomain or path.
+    """
+
+    def __init__(self, records=(), key: str = "Domain"):
+        self.domains = {}
+        self.size = 0
+        for record in records:
+            self.add(record[key], record)
+
+    def add(self, site: str, record):
+        host, path = split_site(site)
+        if not host:
+            return
+        registered, labels = registered_parts(host)
+        node = self.domains.setdefault(registered, _Node())
+        for label in labels:
+            node = node.children.setdefault(label, _Node())
+        node.entries.append((path, record))
+        node.entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+        self.size += 1
+
+    @staticmethod
+    def _match(node, path: str):
+        for prefix, record in node.entries:
+            if not prefix or path == prefix or path.startswith(f"{prefix}/"):
+                return record
+        return None
+
+    def lookup(self, url: str):
+        """The record of the most specific entry covering `url`, or None."""
+        host, path = split_site(url)
+        if not host:
+            return None
+        registered, labels = registered_parts(host)
+        node = self.domains.get(registered)
+        if node is None:
+            return None
+        found = self._match(node, path)
+        for label in labels:
+            node = node.children.get(label)
+            if node is None:
+                break
+            found = self._match(node, path) or found
+        return found
+
+    def resolution_key(self, url: str) -> str:
+        """
+        A key under which lookup(url) can be memoized: the registered domain when every URL
+        under it resolves the same way (no subdomain- or path-specific entries), else the URL.
+        """
+        host, _ = split_site(url)
+        registered, _ = registered_parts(host) if host else ("", [])
+        node = self.domains.get(registered)
+        if node is None or (not node.children and all(not prefix for prefix, _ in node.entries)):
+            return registered
+        return url
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,373 @@
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+# Point layers for the maps: the pipeline aggregates located records into a compact
+# GeoJSON file, the API serves it (optionally cut to a bounding box), and the map
+# page is a constant-size Leaflet shell that clusters the points in the browser.
+
+USER_POINTS_FILE = "user_locations.geojson"
+TWEET_POINTS_FILE = "tweet_points.json"
+MAX_NAMES_PER_POINT = 10
+SAMPLES_PER_BUCKET = 5
+DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)\s*(s|sec|m|min|h|hour|d|day|w|week)s?$", re.IGNORECASE)
+ISO_DURATION_RE = re.compile(r"^P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$", re.IGNORECASE)
+UNIT_SECONDS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600,
+                "d": 86400, "day": 86400, "w": 604800, "week": 604800}
+
+def aggregate_points(records, precision: int = 4, max_names: int = MAX_NAMES_PER_POINT):
+    """
+    GeoJSON features from (latitude, longitude, name, label) records, one per distinct
+    rounded position. Co-located records are counted and the first `max_names`
+    names are kept for the popup.
+    """
+    points = {}
+    for lat, lon, name, label in records:
+        key = (round(lat, precision), round(lon, precision))
+        point = points.get(key)
+        if point is None:
+            point = points[key] = {"n": 0, "names": [], "label": label}
+        point["n"] += 1
+        if len(point["names"]) < max_names and name not in point["names"]:
+            point["names"].append(name)
+    return [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": props
+        }
+        for (lat, lon), props in points.items()
+    ]
+
+def write_geojson(features, path: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def parse_bbox(bbox: str):
+    """
+    'min_lon,min_lat,max_lon,max_lat' -> tuple of floats, with longitudes wrapped into
+    [-180, 180) as a panned web map reports them unwrapped. Raises ValueError if malformed.
+    """
+    parts = [float(part) for part in bbox.split(",")]
+    if len(parts) != 4 or parts[1] > parts[3]:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    min_lon, min_lat, max_lon, max_lat = parts
+    if max_lon - min_lon >= 360:
+        return (-180.0, min_lat, 180.0, max_lat)
+    wrap = lambda lon: (lon + 180) % 360 - 180
+    return (wrap(min_lon), min_lat, wrap(max_lon), max_lat)
+
+def in_bbox(feature, bbox) -> bool:
+    min_lon, min_lat, max_lon, max_lat = bbox
+    lon, lat = feature["geometry"]["coordinates"]
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lon <= max_lon:
+        return min_lon <= lon <= max_lon
+    # The box crosses the antimeridian
+    return lon >= min_lon or lon <= max_lon
+
+class PointLayer:
+    """A GeoJSON point file loaded once and reloaded when it changes on disk."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = None
+        self.features = []
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Return (version, features), reading the file again only if it changed."""
+        stat = os.stat(self.path)
+        version = f"{stat.st_size}-{stat.st_mtime_ns}"
+        with self.lock:
+            if version != self.version:
+                with open(self.path, encoding="utf-8") as f:
+                    self.features = json.load(f)["features"]
+                self.version = version
+            return self.version, self.features
+
+    def query(self, bbox=None):
+        version, features = self.load()
+        if bbox is not None:
+            features = [feature for feature in features if in_bbox(feature, bbox)]
+        return version, {"type": "FeatureCollection", "features": features}
+
+def parse_duration(text: str) -> int:
+    """Bin size in seconds from '15min', '6h', '1d' or an ISO 8601 duration such as 'PT1H'. Raises ValueError."""
+    text = text.strip()
+    match = DURATION_RE.match(text)
+    if match:
+        seconds = float(match.group(1)) * UNIT_SECONDS[match.group(2).lower()]
+    else:
+        match = ISO_DURATION_RE.match(text)
+        if not match or not any(match.groups()):
+            raise ValueError(f"Invalid duration '{text}'. Use e.g. 15min, 6h, 1d or PT1H.")
+        weeks, days, hours, minutes, secs = (int(group or 0) for group in match.groups())
+        seconds = weeks * 604800 + days * 86400 + hours * 3600 + minutes * 60 + secs
+    if seconds < 60:
+        raise ValueError("The bin size must be at least one minute.")
+    return int(seconds)
+
+def write_tweet_points(records, path: str):
+    """
+    Located tweets as rows of [unix time, latitude, longitude, location, username, text].
+    This file stays on the server; maps receive binned counts derived from it.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"columns": ["time", "lat", "lon", "location", "username", "text"], "rows": records},
+                  f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+class TimeBinnedLayer:
+    """
+    Located tweets aggregated into (time bin, grid cell) buckets with a count and a
+    few sample tweets each. Aggregations are cached per bin size and cell size and
+    rebuilt when the points file changes. The map payload holds only cells and
+    counts, so its size is bounded by bins x cells; samples are fetched per bucket.
+    """
+
+    def __init__(self, path: str, max_entries: int = 16):
+        self.path = path
+        self.max_entries = max_entries
+        self.version = None
+        self.rows = []
+        self.aggregations = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _load(self):
+        stat = os.stat(self.path)
+        version = f"{stat.st_size}-{stat.st_mtime_ns}"
+        if version != self.version:
+            with open(self.path, encoding="utf-8") as f:
+                self.rows = json.load(f)["rows"]
+            self.version = version
+            self.aggregations.clear()
+        return version
+
+    def _aggregate(self, bin_seconds: int, cell_degrees: float):
+        cells, labels, buckets = {}, [], {}
+        for row in self.rows:
+            timestamp, lat, lon, location = row[0], row[1], row[2], row[3]
+            cell_key = (math.floor(lat / cell_degrees), math.floor(lon / cell_degrees))
+            cell = cells.get(cell_key)
+            if cell is None:
+                cell = cells[cell_key] = len(labels)
+                labels.append(Counter())
+            labels[cell][location] += 1
+            key = (int(timestamp // bin_seconds) * bin_seconds, cell)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [0, []]
+            bucket[0] += 1
+            if len(bucket[1]) < SAMPLES_PER_BUCKET:
+                bucket[1].append(row)
+        cell_list = [None] * len(labels)
+        for (lat_index, lon_index), cell in cells.items():
+            # Cell centre, labelled with the most frequent location name in it
+            cell_list[cell] = [round((lon_index + 0.5) * cell_degrees, 5), round((lat_index + 0.5) * cell_degrees, 5),
+                               labels[cell].most_common(1)[0][0]]
+        return {"cells": cell_list, "buckets": dict(sorted(buckets.items()))}
+
+    def _get(self, bin_seconds: int, cell_degrees: float):
+        with self.lock:
+            version = self._load()
+            key = (bin_seconds, cell_degrees)
+            aggregation = self.aggregations.get(key)
+            if aggregation is None:
+                aggregation = self._aggregate(bin_seconds, cell_degrees)
+                self.aggregations[key] = aggregation
+                while len(self.aggregations) > self.max_entries:
+                    self.aggregations.popitem(last=False)
+            self.aggregations.move_to_end(key)
+            return version, aggregation
+
+    def bins(self, bin_seconds: int, cell_degrees: float):
+        """(version, payload) with cells as [lon, lat, label] and buckets as [bin start, cell index, count]."""
+        version, aggregation = self._get(bin_seconds, cell_degrees)
+        return version, {
+            "bin_seconds": bin_seconds,
+            "cell_degrees": cell_degrees,
+            "cells": aggregation["cells"],
+            "buckets": [[start, cell, bucket[0]] for (start, cell), bucket in aggregation["buckets"].items()]
+        }
+
+    def samples(self, bin_seconds: int, cell_degrees: float, start: int, cell: int):
+        """Sample tweets of one bucket, or None if there is no such bucket."""
+        _, aggregation = self._get(bin_seconds, cell_degrees)
+        bucket = aggregation["buckets"].get((start, cell))
+        if bucket is None:
+            return None
+        return {
+            "count": bucket[0],
+            "tweets": [
+                {
+                    "time": datetime.fromtimestamp(row[0], tz=timezone.utc).isoformat(),
+                    "location": row[3],
+                    "username": row[4],
+                    "text": row[5]
+                }
+                for row in bucket[1]
+            ]
+        }
+
+MAP_SHELL = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.css">
+<link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.Default.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<script src="https://unpkg.com/leaflet.markercluster@1.5.3/dist/leaflet.markercluster.js"></script>
+<style>html, body, #map {{ height: 100%; margin: 0; }}</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var map = L.map('map').setView([20, 0], 2);
+L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
+  attribution: '&copy; OpenStreetMap contributors'
+}}).addTo(map);
+// Clusters show the number of records behind their points, not the number of points
+var clusters = L.markerClusterGroup({{
+  chunkedLoading: true,
+  iconCreateFunction: function (cluster) {{
+    var total = 0;
+    cluster.getAllChildMarkers().forEach(function (m) {{ total += m.options.n; }});
+    var size = total < 10 ? 'small' : total < 100 ? 'medium' : 'large';
+    return L.divIcon({{ html: '<div><span>' + total + '</span></div>',
+                        className: 'marker-cluster marker-cluster-' + size, iconSize: L.point(40, 40) }});
+  }}
+}});
+map.addLayer(clusters);
+function escapeHtml(text) {{
+  return String(text).replace(/[&<>"']/g, function (c) {{
+    return {{'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}}[c];
+  }});
+}}
+function popup(p) {{
+  var names = p.names.map(escapeHtml).join(', ');
+  var more = p.n > p.names.length ? ' and ' + (p.n - p.names.length) + ' more' : '';
+  return '<b>' + escapeHtml(p.label) + '</b> (' + p.n + ')<br>' + names + more;
+}}
+var pending = null;
+function load() {{
+  var b = map.getBounds().pad(0.5);
+  var bbox = [b.getWest(), b.getSouth(), b.getEast(), b.getNorth()].join(',');
+  if (pending) {{ pending.abort(); }}
+  pending = new AbortController();
+  fetch('{points_url}?bbox=' + bbox, {{ signal: pending.signal }})
+    .then(function (r) {{ return r.json(); }})
+    .then(function (data) {{
+      clusters.clearLayers();
+      clusters.addLayers(data.features.map(function (f) {{
+        var c = f.geometry.coordinates;
+        return L.marker([c[1], c[0]], {{ n: f.properties.n }}).bindPopup(popup(f.properties));
+      }}));
+    }})
+    .catch(function () {{}});
+}}
+map.on('moveend', load);
+load();
+</script>
+</body>
+</html>
+"""
+
+TIME_MAP_SHELL = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>
+html, body, #map {{ height: 100%; margin: 0; }}
+#controls {{ position: absolute; bottom: 20px; left: 50px; right: 50px; z-index: 1000; background: white;
+             padding: 6px 10px; border-radius: 4px; font: 13px sans-serif; display: flex; gap: 8px; align-items: center; }}
+#slider {{ flex: 1; }}
+</style>
+</head>
+<body>
+<div id="map"></div>
+<div id="controls"><button id="play">Play</button><input id="slider" type="range" min="0" max="0" value="0"><span id="label"></span></div>
+<script>
+// Bin and cell size come from this page's query string, e.g. ?bin=6h&cell=1
+var params = new URLSearchParams(window.location.search);
+var query = 'bin=' + encodeURIComponent(params.get('bin') || '1h') + '&cell=' + encodeURIComponent(params.get('cell') || '0.5');
+var map = L.map('map').setView([20, 0], 2);
+L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
+  attribution: '&copy; OpenStreetMap contributors'
+}}).addTo(map);
+var layer = L.layerGroup().addTo(map);
+var data = null, times = [], byTime = {{}}, timer = null;
+function escapeHtml(text) {{
+  return String(text).replace(/[&<>"']/g, function (c) {{
+    return {{'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}}[c];
+  }});
+}}
+function show(i) {{
+  layer.clearLayers();
+  var t = times[i];
+  if (t === undefined) {{ return; }}
+  document.getElementById('label').textContent = new Date(t * 1000).toISOString().replace('.000Z', 'Z');
+  byTime[t].forEach(function (b) {{
+    var cell = data.cells[b[1]];
+    var marker = L.circleMarker([cell[1], cell[0]], {{ radius: 4 + 3 * Math.log2(1 + b[2]), weight: 1 }});
+    marker.bindPopup('Loading...');
+    // Sample tweets are only fetched when a bucket is opened
+    marker.on('click', function () {{
+      fetch('{samples_url}?' + query + '&start=' + t + '&cell_id=' + b[1])
+        .then(function (r) {{ return r.json(); }})
+        .then(function (s) {{
+          var html = '<b>' + escapeHtml(cell[2]) + '</b> (' + s.count + ' tweets)<br>' + s.tweets.map(function (tw) {{
+            return '<b>@' + escapeHtml(tw.username) + '</b>: ' + escapeHtml(tw.text);
+          }}).join('<br>');
+          marker.setPopupContent(html);
+        }});
+    }});
+    layer.addLayer(marker);
+  }});
+}}
+fetch('{bins_url}?' + query)
+  .then(function (r) {{ return r.json(); }})
+  .then(function (d) {{
+    data = d;
+    d.buckets.forEach(function (b) {{ (byTime[b[0]] = byTime[b[0]] || []).push(b); }});
+    times = Object.keys(byTime).map(Number).sort(function (a, b) {{ return a - b; }});
+    var slider = document.getElementById('slider');
+    slider.max = Math.max(times.length - 1, 0);
+    slider.oninput = function () {{ show(+slider.value); }};
+    document.getElementById('play').onclick = function () {{
+      if (timer) {{ clearInterval(timer); timer = null; this.textContent = 'Play'; return; }}
+      this.textContent = 'Pause';
+      timer = setInterval(function () {{
+        slider.value = (+slider.value + 1) % times.length;
+        show(+slider.value);
+      }}, 1000);
+    }};
+    show(0);
+  }});
+</script>
+</body>
+</html>
+"""
+
+def time_map_shell(bins_url: str, samples_url: str, title: str = "Tweet Locations Over Time") -> str:
+    """Time-series map page that loads bucket counts from `bins_url` and popups from `samples_url`."""
+    return TIME_MAP_SHELL.format(bins_url=bins_url, samples_url=samples_url, title=title)
+
+def map_shell(points_url: str, title: str = "User Locations") -> str:
+    """Map page that fetches its points from `points_url`; its size does not depend on the data."""
+    return MAP_SHELL.format(points_url=points_url, title=title)
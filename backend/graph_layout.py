@@ -0,0 +1,104 @@
+import math
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+
+PRUNE_METHODS = ("weight", "backbone")
+
+def disparity_significance(G: nx.Graph):
+    """
+    Disparity-filter significance of every edge (Serrano, Boguna & Vespignani, 2009).
+    For an edge seen from a node with strength s and degree k, alpha = (1 - w/s)^(k-1);
+    an edge is kept by the backbone if it is significant for either endpoint,
+    so the smaller of the two alphas is returned. Lower is more significant.
+    Leaves carry no information on their own side and are judged by the other endpoint.
+    """
+    strength = dict(G.degree(weight="weight"))
+    degree = dict(G.degree())
+    significance = {}
+    for u, v, data in G.edges(data=True):
+        weight = data.get("weight", 1)
+        alphas = []
+        for node in (u, v):
+            k = degree[node]
+            if k <= 1 or strength[node] <= 0:
+                alphas.append(1.0)
+                continue
+            alphas.append((1 - weight / strength[node]) ** (k - 1))
+        significance[(u, v)] = min(alphas)
+    return significance
+
+def prune_graph(G: nx.Graph, edge_budget: int = None, method: str = "weight", alpha: float = 0.05):
+    """
+    Return a copy of G with at most `edge_budget` edges and no isolated nodes.
+
+    method="weight" keeps the heaviest edges. method="backbone" first keeps the
+    edges passing the disparity filter at level `alpha`, then applies the budget
+    by significance so locally important but light edges survive.
+    """
+    if method not in PRUNE_METHODS:
+        raise ValueError(f"Unknown prune method '{method}'. Expected one of {', '.join(PRUNE_METHODS)}.")
+    edges = list(G.edges(data=True))
+    if method == "backbone":
+        significance = disparity_significance(G)
+        edges = [e for e in edges if significance[(e[0], e[1])] < alpha]
+        edges.sort(key=lambda e: (significance[(e[0], e[1])], -e[2].get("weight", 1)))
+    else:
+        edges.sort(key=lambda e: e[2].get("weight", 1), reverse=True)
+    if edge_budget is not None:
+        edges = edges[:edge_budget]
+    pruned = nx.Graph()
+    for u, v, data in edges:
+        pruned.add_node(u, **G.nodes[u])
+        pruned.add_node(v, **G.nodes[v])
+        pruned.add_edge(u, v, **data)
+    return pruned
+
+def compute_layout(G: nx.Graph, scale: float = 1000.0, seed: int = 42):
+    """
+    Force-directed node positions computed once on the server, in pixel-like units.
+    """
+    if G.number_of_nodes() == 0:
+        return {}
+    iterations = 50 if G.number_of_nodes() <= 1000 else 30
+    k = 1.0 / math.sqrt(G.number_of_nodes())
+    positions = nx.spring_layout(G, k=k, weight="weight", iterations=iterations, seed=seed, scale=scale)
+    return {node: (float(x), float(y)) for node, (x, y) in positions.items()}
+
+def graph_to_json(G: nx.Graph, positions: dict):
+    """
+    Compact graph export: nodes as [term, count, x, y] and edges as [source index, target index, weight].
+    """
+    index = {}
+    nodes = []
+    for node, data in G.nodes(data=True):
+        index[node] = len(nodes)
+        x, y = positions.get(node, (0.0, 0.0))
+        nodes.append([node, data.get("count", 0), round(x, 1), round(y, 1)])
+    edges = [[index[u], index[v], data.get("weight", 1)] for u, v, data in G.edges(data=True)]
+    return {"nodes": nodes, "edges": edges}
+
+class GraphLayoutCache:
+    """
+    Small LRU cache of (pruned graph, positions) keyed by state version and query parameters.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
@@ -0,0 +1,12 @@
+"""
+Tweet enrichment pipeline (the steps of model/main.ipynb) with per-stage on-disk caching.
+
+    python -m pipeline run --tweets tweets.csv --users users.csv --output-dir .
+    python -m pipeline stream --tweets tweets.csv --output-dir .
+"""
+
+from pipeline.core import Pipeline, Source, Stage, StageCache, StageContext
+from pipeline.stages import build_pipeline, default_stages
+from pipeline.stream import StreamWorker
+
+__all__ = ["Pipeline", "Source", "Stage", "StageCache", "StageContext", "StreamWorker", "build_pipeline", "default_stages"]
@@ -0,0 +1,40 @@
+import os
+import argparse
+
+from pipeline.stages import build_pipeline
+from pipeline.stream import StreamWorker
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pipeline", description="Tweet enrichment pipeline")
+    parser.add_argument("command", choices=["run", "list", "clean", "stream"])
+    parser.add_argument("--tweets", default="tweets.csv", help="Tweets CSV")
+    parser.add_argument("--users", default="users.csv", help="Users CSV")
+    parser.add_argument("--output-dir", default=".", help="Where outputs and plots are written")
+    parser.add_argument("--cache-dir", default=None, help="Stage cache (default: <output-dir>/.pipeline_cache)")
+    parser.add_argument("--stage", action="append", default=[],
+                        help="Run only this stage and what it depends on (repeatable)")
+    parser.add_argument("--force", action="append", default=[],
+                        help="Re-run this stage even if its cached output is current (repeatable)")
+    parser.add_argument("--interval", type=float, default=2.0,
+                        help="stream: seconds between polls of the tweets file")
+    parser.add_argument("--from-end", action="store_true",
+                        help="stream: without a checkpoint, keep analyzed_tweets.csv and only enrich new tweets")
+    parser.add_argument("--once", action="store_true", help="stream: enrich what is new and exit")
+    args = parser.parse_args(argv)
+
+    pipeline = build_pipeline(args.tweets, args.users, output_dir=args.output_dir, cache_dir=args.cache_dir)
+    if args.command == "list":
+        for name in pipeline.order():
+            stage = pipeline.stages[name]
+            print(f"{name}: <- {', '.join(stage.inputs)}")
+    elif args.command == "clean":
+        pipeline.cache.clear()
+        print(f"Cleared {pipeline.cache_dir}")
+    elif args.command == "stream":
+        worker = StreamWorker(pipeline, args.tweets, os.path.join(args.output_dir, "analyzed_tweets.csv"))
+        worker.run(interval=args.interval, once=args.once, from_end=args.from_end)
+    else:
+        pipeline.run(targets=args.stage or None, force=set(args.force))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import inspect
+
+CACHE_FORMAT_VERSION = 1
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def code_digest(func) -> str:
+    """Hash of a function's source, so editing a stage invalidates only that stage."""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = func.__qualname__
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+class Source:
+    """A raw input file of the pipeline, fingerprinted by content."""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+
+    def fingerprint(self) -> str:
+        return file_digest(self.path)
+
+class Stage:
+    """
+    One enrichment step.
+
+    `func(ctx, **inputs)` receives the outputs of the stages (or sources) named
+    in `inputs` as keyword arguments and returns a picklable value, usually a
+    DataFrame or Series aligned with the tweets. Stages that write files list
+    them in `artifacts` (relative to the output directory); their cached result
+    is only reused while those files exist. The fingerprint of a stage covers
+    its name, code, `version`, `params` and the fingerprints of its inputs;
+    bump `version` when a module-level helper the stage calls changes behaviour.
+    """
+
+    def __init__(self, name: str, func, inputs=(), params=None, artifacts=(), version: str = "1"):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = dict(params or {})
+        self.artifacts = tuple(artifacts)
+        self.version = version
+
+    def fingerprint(self, input_fingerprints: dict) -> str:
+        payload = {
+            "name": self.name,
+            "code": code_digest(self.func),
+            "version": self.version,
+            "params": self.params,
+            "inputs": {name: input_fingerprints[name] for name in self.inputs}
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class StageContext:
+    """What a stage function gets besides its inputs."""
+
+    def __init__(self, pipeline, stage: Stage):
+        self.pipeline = pipeline
+        self.stage = stage
+        self.params = stage.params
+        self.output_dir = pipeline.output_dir
+        self.cache_dir = pipeline.cache_dir
+
+    def output_path(self, filename: str) -> str:
+        return os.path.join(self.output_dir, filename)
+
+class StageCache:
+    """On-disk store of stage outputs keyed by stage name and fingerprint."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, stage_name: str, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{stage_name}-{fingerprint[:20]}.pkl")
+
+    def load(self, stage_name: str, fingerprint: str):
+        """Return (True, value) on a hit, (False, None) otherwise."""
+        path = self._path(stage_name, fingerprint)
+        if not os.path.exists(path):
+            return False, None
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except Exception:
+            return False, None
+        if data.get("format") != CACHE_FORMAT_VERSION or data.get("fingerprint") != fingerprint:
+            return False, None
+        return True, data["value"]
+
+    def store(self, stage_name: str, fingerprint: str, value):
+        path = self._path(stage_name, fingerprint)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"format": CACHE_FORMAT_VERSION, "fingerprint": fingerprint, "value": value}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        # Older outputs of the same stage can never be hit again once their inputs moved on
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(f"{stage_name}-") and name.endswith(".pkl") and os.path.join(self.cache_dir, name) != path:
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl") or name.endswith(".tmp"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+class Pipeline:
+    """
+    A set of sources and stages run in dependency order with per-stage caching.
+    A stage is skipped when its fingerprint (code, params and inputs) is unchanged
+    and its cached output and artifacts are still there.
+    """
+
+    def __init__(self, sources, stages, output_dir: str = ".", cache_dir: str = None, log=print):
+        self.sources = {source.name: source for source in sources}
+        self.stages = {stage.name: stage for stage in stages}
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir or os.path.join(output_dir, ".pipeline_cache")
+        self.cache = StageCache(self.cache_dir)
+        self.log = log
+        for stage in stages:
+            for name in stage.inputs:
+                if name not in self.sources and name not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown input '{name}'.")
+
+    def order(self, targets=None, given=()):
+        """
+        Stage names needed for `targets` (all stages by default) in dependency order.
+        Stages named in `given` are treated as available and not descended into.
+        """
+        targets = list(targets or self.stages)
+        ordered, visiting, done = [], set(), set(given)
+
+        def visit(name):
+            if name in done or name in self.sources:
+                return
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'.")
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage '{name}'.")
+            visiting.add(name)
+            for dependency in self.stages[name].inputs:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+            ordered.append(name)
+
+        for target in targets:
+            visit(target)
+        return ordered
+
+    def _artifacts_exist(self, stage: Stage) -> bool:
+        return all(os.path.exists(os.path.join(self.output_dir, artifact)) for artifact in stage.artifacts)
+
+    def run(self, targets=None, force=()):
+        """
+        Run the stages needed for `targets`, reusing cached outputs where possible.
+        Stages named in `force` are re-run regardless. Returns {stage name: output}.
+        """
+        fingerprints = {}
+        values = {}
+        for name, source in self.sources.items():
+            if os.path.exists(source.path):
+                fingerprints[name] = source.fingerprint()
+        for name in self.order(targets):
+            stage = self.stages[name]
+            missing = [dep for dep in stage.inputs if dep not in fingerprints]
+            if missing:
+                raise FileNotFoundError(f"Stage '{name}' is missing inputs: {', '.join(missing)}")
+            fingerprint = stage.fingerprint(fingerprints)
+            fingerprints[name] = fingerprint
+            if name not in force and self._artifacts_exist(stage):
+                hit, value = self.cache.load(name, fingerprint)
+                if hit:
+                    self.log(f"[skip] {name}")
+                    values[name] = value
+                    continue
+            inputs = {}
+            for dep in stage.inputs:
+                if dep not in values:
+                    values[dep] = self._load_input(dep, fingerprints[dep])
+                inputs[dep] = values[dep]
+            started = time.time()
+            value = stage.func(StageContext(self, stage), **inputs)
+            self.cache.store(name, fingerprint, value)
+            values[name] = value
+            self.log(f"[run]  {name} ({time.time() - started:.1f}s)")
+        return values
+
+    def run_in_memory(self, values: dict, targets):
+        """
+        Run the stages needed for `targets` on in-memory outputs, e.g. {"tweets": frame}
+        for a handful of new tweets, without reading or writing the stage cache.
+        Returns {stage name: output}, including the given values.
+        """
+        values = dict(values)
+        for name in self.order(targets, given=values):
+            stage = self.stages[name]
+            missing = [dep for dep in stage.inputs if dep not in values]
+            if missing:
+                raise ValueError(f"Stage '{name}' is missing inputs: {', '.join(missing)}")
+            values[name] = stage.func(StageContext(self, stage), **{dep: values[dep] for dep in stage.inputs})
+        return values
+
+    def _load_input(self, name: str, fingerprint: str):
+        if name in self.sources:
+            return self.sources[name].path
+        hit, value = self.cache.load(name, fingerprint)
+        if not hit:
+            raise RuntimeError(f"Cached output of stage '{name}' disappeared.")
+        return value
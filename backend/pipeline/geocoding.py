@@ -0,0 +1,111 @@
+import os
+import re
+import csv
+import time
+
+from geopy.exc import GeopyError
+from geopy.extra.rate_limiter import RateLimiter
+from geopy.geocoders import Nominatim
+
+from pipeline.kvcache import KeyValueCache
+
+GAZETTEER_FILE = os.environ.get("GEONAMES_FILE", "cities15000.txt")
+USER_AGENT = "tweet_geocoder"
+# Unresolvable strings are retried after this long, in case the remote service learned them
+NEGATIVE_TTL = 30 * 24 * 3600
+
+def normalize_location(location) -> str:
+    """Cache key for a location string: casefolded, whitespace collapsed, outer punctuation dropped."""
+    if not isinstance(location, str):
+        return ""
+    location = re.sub(r"\s+", " ", location.casefold())
+    return location.strip(" .,;:!?-#@'\"()[]")
+
+def load_gazetteer(path: str = GAZETTEER_FILE) -> dict:
+    """
+    normalized name -> (latitude, longitude) from a local table. Accepts a GeoNames
+    dump (cities15000.txt, allCountries.txt: tab separated, names and alternate
+    names are all indexed, the most populous place wins) or a CSV with name,
+    latitude and longitude columns. Returns an empty table if the file is missing.
+    """
+    gazetteer = {}
+    if not path or not os.path.exists(path):
+        return gazetteer
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = normalize_location(row["name"])
+                if key and key not in gazetteer:
+                    gazetteer[key] = (float(row["latitude"]), float(row["longitude"]))
+        return gazetteer
+    population = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 15:
+                continue
+            coords = (float(fields[4]), float(fields[5]))
+            people = int(fields[14] or 0)
+            names = [fields[1], fields[2]] + fields[3].split(",")
+            for name in names:
+                key = normalize_location(name)
+                if key and people >= population.get(key, -1):
+                    gazetteer[key] = coords
+                    population[key] = people
+    return gazetteer
+
+class Geocoder:
+    """
+    Location string -> (latitude, longitude) with three tiers: a persistent cache
+    of normalized strings (including negative entries), an offline gazetteer and,
+    for what is left, Nominatim behind a rate limiter. Transient remote errors are
+    not cached, so those strings are tried again on the next run.
+    """
+
+    def __init__(self, cache: KeyValueCache, gazetteer: dict = None, remote: bool = True,
+                 min_delay_seconds: float = 1.0, user_agent: str = USER_AGENT):
+        self.cache = cache
+        self.gazetteer = gazetteer or {}
+        self.remote = None
+        if remote:
+            geolocator = Nominatim(user_agent=user_agent)
+            self.remote = RateLimiter(geolocator.geocode, min_delay_seconds=min_delay_seconds,
+                                      max_retries=2, swallow_exceptions=False)
+
+    def _lookup_remote(self, location: str):
+        try:
+            found = self.remote(location)
+        except GeopyError:
+            return False, None
+        return True, (found.latitude, found.longitude) if found else None
+
+    def geocode_many(self, locations) -> dict:
+        """Coordinates (or None) for each distinct normalized location string."""
+        keys = {normalize_location(location) for location in locations} - {""}
+        now = time.time()
+        cached = self.cache.get_many(keys)
+        results = {}
+        for key, entry in cached.items():
+            if entry["coords"] is not None or now - entry["at"] < NEGATIVE_TTL:
+                results[key] = tuple(entry["coords"]) if entry["coords"] else None
+        resolved = []
+        for key in sorted(keys - results.keys()):
+            if key in self.gazetteer:
+                coords = self.gazetteer[key]
+            elif self.remote is not None:
+                ok, coords = self._lookup_remote(key)
+                if not ok:
+                    continue
+            else:
+                continue
+            results[key] = coords
+            resolved.append((key, {"coords": coords, "at": now}))
+            # Remote lookups are slow; keep what was learned if the run is interrupted
+            if len(resolved) >= 50:
+                self.cache.put_many(resolved)
+                resolved = []
+        self.cache.put_many(resolved)
+        return results
+
+    def geocode(self, location):
+        return self.geocode_many([location]).get(normalize_location(location))
@@ -0,0 +1,36 @@
+import numpy as np
+import scipy.sparse as sp
+
+def top_k_per_row(matrix, k: int = None):
+    """
+    (row index, column index, value) arrays of the k largest positive entries of
+    every row of a sparse matrix, ordered by row and then by descending value.
+
+    Works on the CSR data/indices arrays directly: one lexsort over the stored
+    entries ranks each row without densifying it or sorting the vocabulary.
+    """
+    matrix = sp.csr_matrix(matrix)
+    matrix.sum_duplicates()
+    counts = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(matrix.shape[0]), counts)
+    data = matrix.data
+    indices = matrix.indices
+    # Primary key row, then value descending, then column for a stable tie order
+    order = np.lexsort((indices, -data, rows))
+    rows, indices, data = rows[order], indices[order], data[order]
+    keep = data > 0
+    if k is not None:
+        rank = np.arange(len(rows)) - np.repeat(matrix.indptr[:-1], counts)
+        keep &= rank < k
+    return rows[keep], indices[keep], data[keep]
+
+def top_keywords(matrix, feature_names, k: int = None):
+    """Per-row lists of (term, score) for the k best terms, highest score first."""
+    rows, indices, data = top_k_per_row(matrix, k)
+    keywords = [[] for _ in range(matrix.shape[0])]
+    boundaries = np.searchsorted(rows, np.arange(matrix.shape[0] + 1))
+    terms = np.asarray(feature_names, dtype=object)[indices]
+    for row in np.flatnonzero(np.diff(boundaries)):
+        start, end = boundaries[row], boundaries[row + 1]
+        keywords[row] = list(zip(terms[start:end].tolist(), data[start:end].tolist()))
+    return keywords
@@ -0,0 +1,46 @@
+import json
+import sqlite3
+import hashlib
+import threading
+
+def hash_key(*parts) -> str:
+    """Stable key for a tuple of strings (backend name, text, ...)."""
+    return hashlib.sha1("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+class KeyValueCache:
+    """
+    Small persistent key -> JSON value store on SQLite, shared by the pipeline
+    stages that call slow detectors or remote services.
+    """
+
+    def __init__(self, path: str, table: str):
+        self.path = path
+        self.table = table
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self.lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                found.update({key: json.loads(value) for key, value in rows})
+        return found
+
+    def put_many(self, items):
+        with self.lock:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in items]
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,82 @@
+import os
+import re
+
+from langdetect import DetectorFactory, detect_langs
+
+from pipeline.kvcache import KeyValueCache, hash_key
+
+try:
+    import fasttext
+except ImportError:
+    fasttext = None
+
+DEFAULT_LANGUAGE = "en"
+FASTTEXT_MODEL = os.environ.get("FASTTEXT_LID_MODEL", "lid.176.ftz")
+
+# URLs, handles and hashtags are mostly ASCII noise that pulls short English tweets towards other languages
+NOISE_RE = re.compile(r"https?://\S+|www\.\S+|[@#]\w+|&amp;|\s+")
+
+def clean_for_detection(text) -> str:
+    if not isinstance(text, str):
+        return ""
+    return NOISE_RE.sub(" ", text).strip()
+
+class FastTextDetector:
+    """fastText lid.176 language identification; predicts a whole batch in one call."""
+
+    name = "fasttext"
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.model = fasttext.load_model(model_path)
+
+    def detect_batch(self, texts):
+        labels, probabilities = self.model.predict(list(texts), k=1)
+        return [(label[0].replace("__label__", ""), float(prob[0])) for label, prob in zip(labels, probabilities)]
+
+class LangDetectDetector:
+    """langdetect fallback, seeded so repeated runs give the same answer."""
+
+    name = "langdetect"
+
+    def __init__(self, seed: int = 0):
+        DetectorFactory.seed = seed
+
+    def detect_batch(self, texts):
+        results = []
+        for text in texts:
+            try:
+                best = detect_langs(text)[0]
+                results.append((best.lang, float(best.prob)))
+            except Exception:
+                results.append((DEFAULT_LANGUAGE, 0.0))
+        return results
+
+def get_detector(model_path: str = FASTTEXT_MODEL):
+    """fastText when it is installed and the model file exists, langdetect otherwise."""
+    if fasttext is not None and model_path and os.path.exists(model_path):
+        return FastTextDetector(model_path)
+    return LangDetectDetector()
+
+def detect_languages(texts, detector=None, cache: KeyValueCache = None, batch_size: int = 1000):
+    """
+    (language, confidence) for each text. Texts are cleaned and deduplicated,
+    looked up in the cache, and only the misses go to the detector, in batches.
+    Empty texts get the default language with zero confidence.
+    """
+    detector = detector or get_detector()
+    cleaned = [clean_for_detection(text) for text in texts]
+    keys = {text: hash_key(detector.name, text) for text in set(cleaned) if text}
+    known = {key: tuple(value) for key, value in cache.get_many(keys.values()).items()} if cache is not None else {}
+    missing = [text for text, key in keys.items() if key not in known]
+    for i in range(0, len(missing), batch_size):
+        batch = missing[i:i + batch_size]
+        detected = [(keys[text], result) for text, result in zip(batch, detector.detect_batch(batch))]
+        known.update(detected)
+        if cache is not None:
+            cache.put_many(detected)
+    return [known[keys[text]] if text else (DEFAULT_LANGUAGE, 0.0) for text in cleaned]
+
+def needs_translation(language: str, confidence: float, min_confidence: float) -> bool:
+    """Translate only tweets confidently detected as something other than English."""
+    return language != DEFAULT_LANGUAGE and confidence >= min_confidence
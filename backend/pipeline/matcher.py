@@ -0,0 +1,61 @@
+import json
+from collections import defaultdict
+
+from tweet_tokenizer import tokenize, words
+
+def word_tokens(text):
+    """Lowercased words of a text as produced by the shared tweet tokenizer."""
+    return words(tokenize(text))
+
+class KeywordMatcher:
+    """
+    Whole-word matcher for many keyword lists at once.
+
+    Keywords (single words or phrases) are compiled into a hash table of token
+    tuples, and a text is matched by looking up each of its token n-grams for the
+    phrase lengths that occur in the lists. Cost grows with text length and the
+    number of distinct phrase lengths, not with the number of keywords, and
+    "left" no longer matches inside "leftover".
+    """
+
+    def __init__(self, lexicons: dict, tokenize=word_tokens):
+        self.tokenize = tokenize
+        self.labels = list(lexicons)
+        self.patterns = defaultdict(set)
+        for label, keywords in lexicons.items():
+            for keyword in keywords:
+                tokens = tuple(tokenize(keyword))
+                if tokens:
+                    self.patterns[tokens].add(label)
+        self.lengths = sorted({len(tokens) for tokens in self.patterns})
+
+    def match_tokens(self, tokens) -> dict:
+        """label -> set of distinct keywords (as token tuples) found in the token sequence."""
+        found = defaultdict(set)
+        for n in self.lengths:
+            for i in range(len(tokens) - n + 1):
+                gram = tuple(tokens[i:i + n])
+                for label in self.patterns.get(gram, ()):
+                    found[label].add(gram)
+        return found
+
+    def match(self, text) -> dict:
+        return self.match_tokens(self.tokenize(text))
+
+    def count_many(self, texts, tokens=None):
+        """
+        {label: [number of distinct keywords of that label in each text]}.
+        Pass word lists of already tokenized texts as `tokens` to skip tokenization.
+        """
+        if tokens is None:
+            tokens = [self.tokenize(text) for text in texts]
+        counts = {label: [0] * len(tokens) for label in self.labels}
+        for i, text_tokens in enumerate(tokens):
+            for label, grams in self.match_tokens(text_tokens).items():
+                counts[label][i] = len(grams)
+        return counts
+
+def load_lexicons(path: str) -> dict:
+    """Keyword lists from a JSON file of the form {"label": ["keyword", ...], ...}."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
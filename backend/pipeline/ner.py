@@ -0,0 +1,30 @@
+import functools
+
+import spacy
+
+DEFAULT_MODEL = "en_core_web_sm"
+LOCATION_LABELS = ("GPE", "LOC")
+# Only the entity recognizer (and the tok2vec it may listen to) is needed for locations
+UNUSED_COMPONENTS = ["parser", "tagger", "attribute_ruler", "lemmatizer", "senter", "morphologizer"]
+
+@functools.lru_cache(maxsize=None)
+def load_nlp(model: str = DEFAULT_MODEL):
+    """Load the model once per process with the unused components disabled."""
+    return spacy.load(model, disable=UNUSED_COMPONENTS)
+
+def extract_entities(texts, labels=LOCATION_LABELS, model: str = DEFAULT_MODEL,
+                     batch_size: int = 256, n_process: int = 1):
+    """
+    Unique entity strings with one of `labels` for each text, in order of appearance.
+
+    Distinct texts are streamed through nlp.pipe in batches, so memory stays
+    bounded by the batch size. With n_process > 1 spaCy fans the batches out
+    over worker processes, each holding its own copy of the model.
+    """
+    nlp = load_nlp(model)
+    labels = set(labels)
+    unique_texts = list(dict.fromkeys(text for text in texts if isinstance(text, str) and text))
+    entities = {}
+    for text, doc in zip(unique_texts, nlp.pipe(unique_texts, batch_size=batch_size, n_process=n_process)):
+        entities[text] = list(dict.fromkeys(ent.text for ent in doc.ents if ent.label_ in labels))
+    return [entities.get(text, []) if isinstance(text, str) else [] for text in texts]
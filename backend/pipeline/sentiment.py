@@ -0,0 +1,143 @@
+import re
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from textblob import TextBlob
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+NEGATIONS = {"not", "never", "no", "cannot", "don't", "doesn't", "didn't", "isn't", "aren't",
+             "wasn't", "weren't", "won't", "can't", "couldn't", "shouldn't", "wouldn't"}
+NEGATION_FACTOR = -0.5
+
+def textblob_polarity(text) -> float:
+    if isinstance(text, str) and text.strip():
+        return TextBlob(text).sentiment.polarity
+    return 0.0
+
+def load_pattern_lexicon():
+    """
+    word -> (polarity, intensity, is_modifier) from the pattern lexicon TextBlob
+    scores with, averaged over senses and parts of speech the same way pattern
+    does. Adverbs ("very", "really") are modifiers of the word that follows.
+    """
+    from textblob.en import sentiment as pattern_sentiment
+    pattern_sentiment.load()
+    lexicon = {}
+    for word, senses in pattern_sentiment.items():
+        polarity, _, intensity = senses[None]
+        lexicon[word.lower()] = (float(polarity), float(intensity), "RB" in senses)
+    return lexicon
+
+class LexiconSentiment:
+    """
+    Batch polarity scorer. Each text is tokenized once; polarities are then looked
+    up in a precompiled lexicon array and averaged per text with bincount.
+
+    Follows TextBlob's pattern scorer closely but not exactly: polar words are
+    averaged, a modifier scales the polar word right after it and is not
+    counted on its own, and a preceding negation multiplies a word by -0.5. Use `agreement` to check the difference.
+    """
+
+    def __init__(self, lexicon: dict = None):
+        lexicon = lexicon if lexicon is not None else load_pattern_lexicon()
+        self.vocab = {word: i for i, word in enumerate(lexicon)}
+        self.polarity = np.array([lexicon[word][0] for word in lexicon] + [0.0])
+        self.intensity = np.array([lexicon[word][1] for word in lexicon] + [1.0])
+        self.modifier = np.array([lexicon[word][2] for word in lexicon] + [False], dtype=bool)
+        self.unknown = len(self.vocab)
+        self.term_cache = {}
+
+    def score_batch(self, texts) -> np.ndarray:
+        """Polarity in [-1, 1] for each text; 0.0 for empty or unscored texts."""
+        doc_ids, term_ids, negated = [], [], []
+        for doc_id, text in enumerate(texts):
+            if not isinstance(text, str):
+                continue
+            previous = None
+            for token in TOKEN_RE.findall(text.lower()):
+                doc_ids.append(doc_id)
+                term_ids.append(self.vocab.get(token, self.unknown))
+                negated.append(previous in NEGATIONS)
+                previous = token
+        n = len(texts)
+        if not doc_ids:
+            return np.zeros(n)
+        doc_ids = np.array(doc_ids)
+        term_ids = np.array(term_ids)
+        negated = np.array(negated, dtype=bool)
+
+        polarity = self.polarity[term_ids]
+        is_modifier = self.modifier[term_ids]
+        same_doc = doc_ids[1:] == doc_ids[:-1]
+        # "really good": the modifier scales the next polar word and is absorbed into it
+        modified = np.zeros(len(term_ids), dtype=bool)
+        modified[1:] = same_doc & is_modifier[:-1] & (polarity[1:] != 0)
+        previous_intensity = np.ones(len(term_ids))
+        previous_intensity[1:] = self.intensity[term_ids[:-1]]
+        absorbed = np.zeros(len(term_ids), dtype=bool)
+        absorbed[:-1] = modified[1:]
+        polarity = np.clip(np.where(modified, polarity * previous_intensity, polarity), -1.0, 1.0)
+        polarity[absorbed] = 0.0
+        polarity[negated] *= NEGATION_FACTOR
+
+        scored = polarity != 0
+        sums = np.bincount(doc_ids[scored], weights=polarity[scored], minlength=n)
+        counts = np.bincount(doc_ids[scored], minlength=n)
+        scores = np.divide(sums, counts, out=np.zeros(n), where=counts > 0)
+        return np.clip(scores, -1.0, 1.0)
+
+    def score_terms(self, terms) -> dict:
+        """Polarity of each distinct term, scoring only the ones not seen before."""
+        new_terms = [term for term in set(terms) if term not in self.term_cache]
+        if new_terms:
+            self.term_cache.update(zip(new_terms, self.score_batch(new_terms).tolist()))
+        return {term: self.term_cache[term] for term in terms}
+
+def agreement(engine: LexiconSentiment, texts, sample: int = 1000, seed: int = 42) -> dict:
+    """Compare the engine with TextBlob on a sample of texts."""
+    texts = [text for text in texts if isinstance(text, str) and text.strip()]
+    if len(texts) > sample:
+        rng = np.random.default_rng(seed)
+        texts = [texts[i] for i in rng.choice(len(texts), sample, replace=False)]
+    if not texts:
+        return {"n": 0}
+    ours = engine.score_batch(texts)
+    reference = np.array([textblob_polarity(text) for text in texts])
+    result = {
+        "n": len(texts),
+        "mean_abs_diff": float(np.mean(np.abs(ours - reference))),
+        "sign_agreement": float(np.mean(np.sign(ours) == np.sign(reference)))
+    }
+    if np.std(ours) > 0 and np.std(reference) > 0:
+        result["pearson"] = float(np.corrcoef(ours, reference)[0, 1])
+    return result
+
+def benchmark(engine: LexiconSentiment, texts, sample: int = 1000) -> dict:
+    """Tweets per second of the engine and of per-text TextBlob on the same texts."""
+    texts = list(texts)[:sample]
+    started = time.perf_counter()
+    engine.score_batch(texts)
+    lexicon_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for text in texts:
+        textblob_polarity(text)
+    textblob_seconds = time.perf_counter() - started
+    return {
+        "n": len(texts),
+        "lexicon_per_second": len(texts) / lexicon_seconds if lexicon_seconds else float("inf"),
+        "textblob_per_second": len(texts) / textblob_seconds if textblob_seconds else float("inf")
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the lexicon sentiment engine against TextBlob")
+    parser.add_argument("tweets", nargs="?", default="tweets.csv")
+    parser.add_argument("--column", default="text")
+    parser.add_argument("--sample", type=int, default=1000)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.tweets)[args.column].tolist()
+    engine = LexiconSentiment()
+    print("Agreement:", agreement(engine, texts, sample=args.sample))
+    print("Throughput:", benchmark(engine, texts, sample=args.sample))
@@ -0,0 +1,352 @@
+import os
+import functools
+
+import pandas as pd
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+from sklearn.decomposition import LatentDirichletAllocation
+import nltk
+
+from charts import CHARTS
+from geo_points import (TWEET_POINTS_FILE, USER_POINTS_FILE, aggregate_points, map_shell, write_geojson,
+                        write_tweet_points)
+from tweet_tokenizer import mentions, tokenize, tokenize_many, words
+
+from pipeline import langid
+from pipeline.translation import get_backend, translate_texts as translate_batched
+from pipeline.keywords import top_keywords
+from pipeline.geocoding import GAZETTEER_FILE, Geocoder, load_gazetteer, normalize_location
+from pipeline.kvcache import KeyValueCache
+from pipeline.matcher import KeywordMatcher, load_lexicons
+from pipeline.ner import LOCATION_LABELS, extract_entities
+from pipeline.sentiment import LexiconSentiment
+from pipeline.core import Pipeline, Source, Stage, code_digest
+
+#########################################################################
+# Shared resources, loaded only by the stages that need them
+#########################################################################
+
+@functools.lru_cache(maxsize=None)
+def get_stop_words():
+    nltk.download('stopwords', quiet=True)
+    from nltk.corpus import stopwords
+    return list(stopwords.words('english'))
+
+@functools.lru_cache(maxsize=None)
+def get_gazetteer(path):
+    return load_gazetteer(path)
+
+def geocode_unique(ctx, locations):
+    """Coordinates for each distinct location string through the cached, gazetteer-first geocoder."""
+    cache = KeyValueCache(os.path.join(ctx.cache_dir, "geocode.sqlite"), "locations")
+    try:
+        geocoder = Geocoder(cache, get_gazetteer(ctx.params["gazetteer"]), remote=ctx.params["remote"])
+        return geocoder.geocode_many(locations)
+    finally:
+        cache.close()
+
+@functools.lru_cache(maxsize=None)
+def get_sentiment_engine():
+    return LexiconSentiment()
+
+#########################################################################
+# Enrichment stages. Each returns a Series or frame aligned with `tweets`.
+#########################################################################
+
+def load_tweets(ctx, tweets_csv):
+    """Step 1: load and sort tweets by timestamp."""
+    tweets_df = pd.read_csv(tweets_csv)
+    tweets_df['timestamp'] = pd.to_datetime(tweets_df['timestamp'])
+    return tweets_df.sort_values(by='timestamp')
+
+def load_users(ctx, users_csv):
+    return pd.read_csv(users_csv)
+
+def detect_languages(ctx, tweets):
+    """Step 2: batch language ID with a confidence per tweet, cached by text hash."""
+    cache = KeyValueCache(os.path.join(ctx.cache_dir, "langid.sqlite"), "language_ids")
+    try:
+        results = langid.detect_languages(
+            tweets['text'].tolist(),
+            detector=langid.get_detector(ctx.params["model_path"]),
+            cache=cache,
+            batch_size=ctx.params["batch_size"]
+        )
+    finally:
+        cache.close()
+    return pd.DataFrame(results, index=tweets.index, columns=['language_code', 'language_confidence'])
+
+def translate_texts(ctx, tweets, language):
+    """Step 3: translate tweets confidently detected as non-English, deduplicated and cached."""
+    needs = [
+        isinstance(text, str) and langid.needs_translation(code, confidence, ctx.params["min_confidence"])
+        for text, code, confidence in zip(tweets['text'], language['language_code'], language['language_confidence'])
+    ]
+    sources = [text for text, need in zip(tweets['text'], needs) if need]
+    cache = KeyValueCache(os.path.join(ctx.cache_dir, "translations.sqlite"), "translations")
+    try:
+        translated = iter(translate_batched(
+            sources,
+            get_backend(ctx.params["backend"]),
+            cache=cache,
+            batch_size=ctx.params["batch_size"],
+            max_workers=ctx.params["max_workers"]
+        ))
+    finally:
+        cache.close()
+    return pd.Series(
+        [next(translated) if need else text for text, need in zip(tweets['text'], needs)],
+        index=tweets.index,
+        name='translated_text'
+    )
+
+def extract_keywords(ctx, translation):
+    """Step 4: top TF-IDF keywords per tweet, ranked straight from the sparse matrix."""
+    vectorizer = TfidfVectorizer(max_features=ctx.params["max_features"], stop_words=get_stop_words())
+    try:
+        tfidf_matrix = vectorizer.fit_transform(translation.fillna(''))
+    except ValueError:
+        # Only stop words, which happens with the handful of tweets a stream update brings
+        return pd.Series([[] for _ in range(len(translation))], index=translation.index, name='keywords')
+    keywords = top_keywords(tfidf_matrix, vectorizer.get_feature_names_out(), k=ctx.params["top_k"])
+    return pd.Series(keywords, index=translation.index, name='keywords')
+
+def score_sentiment(ctx, keywords, translation):
+    """Step 5: sentiment of each tweet and of its keywords, each distinct keyword scored once."""
+    engine = get_sentiment_engine()
+    term_scores = engine.score_terms([kw for kw_list in keywords for kw, _ in kw_list])
+    keyword_sentiments = keywords.apply(
+        lambda kw_list: [(kw, score, term_scores[kw]) for kw, score in kw_list] if isinstance(kw_list, list) else []
+    )
+    return pd.DataFrame({
+        'keyword_sentiments': keyword_sentiments,
+        'sentence_sentiment': engine.score_batch(translation.tolist())
+    }, index=translation.index)
+
+def extract_locations(ctx, translation):
+    """Step 6a: GPE/LOC entities, batched through spaCy's nlp.pipe."""
+    locations = extract_entities(
+        translation.tolist(),
+        labels=ctx.params["labels"],
+        model=ctx.params["model"],
+        batch_size=ctx.params["batch_size"],
+        n_process=int(os.environ.get("NER_PROCESSES", 1))
+    )
+    return pd.Series(locations, index=translation.index, name='extracted_locations')
+
+def geocode_locations(ctx, locations):
+    """Step 6b: geocode the extracted locations, each distinct string once."""
+    coordinates = geocode_unique(ctx, [loc for locs in locations for loc in locs])
+
+    def coordinates_of(locs):
+        found = [(loc, coordinates.get(normalize_location(loc))) for loc in locs if loc]
+        return [(coords[0], coords[1], loc) for loc, coords in found if coords]
+
+    return locations.apply(coordinates_of).rename('location_coordinates')
+
+def tokenize_texts(ctx, tweets, translation):
+    """Typed tokens of the original and translated text; untranslated tweets are scanned once."""
+    text_tokens = tokenize_many(tweets['text'])
+    translated_tokens = [
+        tokens if translated == text else tokenize(translated)
+        for tokens, text, translated in zip(text_tokens, tweets['text'], translation)
+    ]
+    return pd.DataFrame({'text_tokens': text_tokens, 'translated_tokens': translated_tokens}, index=tweets.index)
+
+def extract_mentions(ctx, tokens):
+    """Step 7: mentioned users."""
+    return tokens['text_tokens'].apply(mentions).rename('mentioned_users')
+
+def assess_political_inclination(ctx, tokens):
+    """Step 8: political inclination from whole-word keyword counts."""
+    counts = KeywordMatcher(ctx.params["lexicons"]).count_many(
+        None, tokens=[words(text_tokens) for text_tokens in tokens['translated_tokens']]
+    )
+    left = np.array(counts.get("left", [0] * len(tokens)))
+    right = np.array(counts.get("right", [0] * len(tokens)))
+    inclination = np.select([left > right, right > left], ['left-leaning', 'right-leaning'], default='neutral')
+    return pd.Series(inclination, index=tokens.index, name='political_inclination')
+
+def assemble_enriched(ctx, tweets, language, translation, keywords, sentiment, locations, geocoding, mentions, political):
+    """All per-tweet columns in one frame."""
+    df = tweets.copy()
+    df['language_code'] = language['language_code']
+    df['language_confidence'] = language['language_confidence']
+    df['translated_text'] = translation
+    df['keywords'] = keywords
+    df['keyword_sentiments'] = sentiment['keyword_sentiments']
+    df['sentence_sentiment'] = sentiment['sentence_sentiment']
+    df['extracted_locations'] = locations
+    df['location_coordinates'] = geocoding
+    df['mentioned_users'] = mentions
+    df['political_inclination'] = political
+    return df
+
+def perform_topic_modeling(ctx, translation):
+    """Step 13: LDA topics over the translated texts."""
+    count_vect = CountVectorizer(max_df=0.95, min_df=2, stop_words='english')
+    doc_term_matrix = count_vect.fit_transform(translation.fillna(''))
+    lda = LatentDirichletAllocation(n_components=ctx.params["n_topics"], random_state=42)
+    lda.fit(doc_term_matrix)
+    feature_names = count_vect.get_feature_names_out()
+    topics = []
+    for topic_idx, topic in enumerate(lda.components_):
+        top_words_idx = topic.argsort()[:-11:-1]
+        topics.append((f"Topic {topic_idx+1}", [feature_names[i] for i in top_words_idx]))
+    return topics
+
+#########################################################################
+# Output stages. Each writes files into the output directory.
+#########################################################################
+
+def render_charts(ctx, enriched):
+    """Render the stage's charts (see charts.CHARTS) into the output directory."""
+    written = []
+    for viz_name in ctx.params["charts"]:
+        render, defaults = CHARTS[viz_name]
+        render(enriched, ctx.output_path(f"{viz_name}.png"), **defaults)
+        written.append(f"{viz_name}.png")
+    return written
+
+def create_user_location_map(ctx, users):
+    """
+    Step 12a: user profile locations as a GeoJSON point file (co-located users merged
+    and counted) plus a map page that clusters them in the browser.
+    """
+    records = []
+    if 'location' in users:
+        coordinates = geocode_unique(ctx, users['location'].dropna().tolist())
+        for username, location in zip(users['username'], users['location']):
+            coordinate = coordinates.get(normalize_location(location))
+            if coordinate:
+                records.append((coordinate[0], coordinate[1], str(username), location))
+    write_geojson(aggregate_points(records), ctx.output_path(USER_POINTS_FILE))
+    with open(ctx.output_path('user_locations_map.html'), 'w', encoding='utf-8') as f:
+        f.write(map_shell(USER_POINTS_FILE))
+    return [USER_POINTS_FILE, 'user_locations_map.html']
+
+def create_tweet_time_series_map(ctx, enriched):
+    """
+    Step 12b: located tweets for the time-series map, one row per (tweet, location).
+    The API bins them by time and grid cell at the bin size the map asks for.
+    """
+    records = []
+    for timestamp, username, text, coordinates in zip(
+            enriched['timestamp'], enriched['username'], enriched['text'], enriched['location_coordinates']):
+        if pd.isna(timestamp):
+            continue
+        for coordinate in coordinates:
+            if coordinate:
+                lat, lon, loc_name = coordinate
+                records.append([timestamp.timestamp(), lat, lon, loc_name, str(username), str(text)[:280]])
+    write_tweet_points(records, ctx.output_path(TWEET_POINTS_FILE))
+    return [TWEET_POINTS_FILE]
+
+def write_report(ctx, enriched, topics):
+    political_counts = enriched['political_inclination'].value_counts()
+    report = f"""
+# Twitter Data Analysis Report
+
+## Overview
+- Total Tweets Analyzed: {len(enriched)}
+- Unique Users: {enriched['username'].nunique()}
+- Average Sentiment Score: {enriched['sentence_sentiment'].mean():.2f}
+
+## Political Distribution
+{political_counts.to_string()}
+
+## Top Topics
+"""
+    for topic_name, top_words in topics:
+        report += f"- {topic_name}: {', '.join(top_words)}\n"
+
+    report += """
+## Key Findings
+- Languages are detected in batch with a confidence score; only tweets confidently detected as non-English are translated via googletrans.
+- Two maps are generated: one showing user locations and one (time-series) showing tweet-extracted geolocations.
+- Linear regression on tweet index provides a trend line for sentiment, and daily tweet counts are analyzed.
+- Topic modeling (LDA) identifies distinct themes within the tweets.
+
+## Generated Visualizations
+- Wordcloud of keywords
+- Keyword co-occurrence heatmap
+- User locations map
+- Time-series map of tweet-extracted locations
+- Sentiment trend line (with linear regression)
+- Daily tweet count trend
+- Political inclination distribution and sentiment vs. politics scatter plot
+"""
+    with open(ctx.output_path('twitter_analysis_report.md'), 'w') as f:
+        f.write(report)
+    return ['twitter_analysis_report.md']
+
+# Columns of analyzed_tweets.csv, shared with the streaming worker that appends to it
+EXPORT_COLUMNS = ['username', 'text', 'timestamp', 'language_code', 'language_confidence', 'translated_text',
+                  'keywords', 'sentence_sentiment', 'extracted_locations',
+                  'mentioned_users', 'political_inclination']
+
+def export_analyzed_tweets(ctx, enriched):
+    final_df = enriched[EXPORT_COLUMNS]
+    final_df.to_csv(ctx.output_path('analyzed_tweets.csv'), index=False)
+    return ['analyzed_tweets.csv']
+
+#########################################################################
+# Registry
+#########################################################################
+
+GEOCODER_PARAMS = {"gazetteer": GAZETTEER_FILE, "remote": os.environ.get("GEOCODER_REMOTE", "1") != "0"}
+TRANSLATION_BACKEND = os.environ.get("TRANSLATION_BACKEND", "googletrans")
+# Matched as whole words, so plurals are listed explicitly
+LEFT_KEYWORDS = ['democrat', 'democrats', 'liberal', 'liberals', 'progressive', 'progressives',
+                 'left', 'biden', 'harris']
+RIGHT_KEYWORDS = ['republican', 'republicans', 'conservative', 'conservatives', 'maga', 'trump', 'right']
+
+def political_lexicons():
+    """Left/right keyword lists, from the JSON file named by POLITICAL_LEXICON if set."""
+    path = os.environ.get("POLITICAL_LEXICON")
+    if path:
+        return load_lexicons(path)
+    return {"left": LEFT_KEYWORDS, "right": RIGHT_KEYWORDS}
+
+def chart_stage(viz_name: str):
+    """One stage per registered chart, invalidated when its render function changes."""
+    render, _ = CHARTS[viz_name]
+    return Stage(viz_name, render_charts, inputs=["enriched"], artifacts=[f"{viz_name}.png"],
+                 params={"charts": [viz_name], "render_code": code_digest(render)})
+
+def default_stages():
+    """The notebook's steps as pipeline stages, in notebook order."""
+    return [
+        Stage("tweets", load_tweets, inputs=["tweets_csv"]),
+        Stage("users", load_users, inputs=["users_csv"]),
+        Stage("language", detect_languages, inputs=["tweets"], version="2",
+              params={"model_path": langid.FASTTEXT_MODEL, "batch_size": 1000}),
+        Stage("translation", translate_texts, inputs=["tweets", "language"], version="2",
+              params={"min_confidence": 0.8, "backend": TRANSLATION_BACKEND, "batch_size": 50, "max_workers": 4}),
+        Stage("keywords", extract_keywords, inputs=["translation"], version="2",
+              params={"max_features": 5, "top_k": 5}),
+        Stage("sentiment", score_sentiment, inputs=["keywords", "translation"], version="2"),
+        Stage("locations", extract_locations, inputs=["translation"], version="2",
+              params={"model": "en_core_web_sm", "labels": list(LOCATION_LABELS), "batch_size": 256}),
+        Stage("geocoding", geocode_locations, inputs=["locations"], version="2", params=GEOCODER_PARAMS),
+        Stage("tokens", tokenize_texts, inputs=["tweets", "translation"], version="2"),
+        Stage("mentions", extract_mentions, inputs=["tokens"]),
+        Stage("political", assess_political_inclination, inputs=["tokens"], version="2",
+              params={"lexicons": political_lexicons()}),
+        Stage("enriched", assemble_enriched,
+              inputs=["tweets", "language", "translation", "keywords", "sentiment",
+                      "locations", "geocoding", "mentions", "political"]),
+        Stage("topics", perform_topic_modeling, inputs=["translation"], params={"n_topics": 5}),
+        Stage("user_map", create_user_location_map, inputs=["users"], params=GEOCODER_PARAMS, version="2",
+              artifacts=[USER_POINTS_FILE, "user_locations_map.html"]),
+        Stage("tweet_map", create_tweet_time_series_map, inputs=["enriched"], version="2",
+              artifacts=[TWEET_POINTS_FILE]),
+        *[chart_stage(viz_name) for viz_name in CHARTS],
+        Stage("report", write_report, inputs=["enriched", "topics"], artifacts=["twitter_analysis_report.md"]),
+        Stage("export", export_analyzed_tweets, inputs=["enriched"], artifacts=["analyzed_tweets.csv"])
+    ]
+
+def build_pipeline(tweets_file: str = "tweets.csv", users_file: str = "users.csv",
+                   output_dir: str = ".", cache_dir: str = None, log=print):
+    sources = [Source("tweets_csv", tweets_file), Source("users_csv", users_file)]
+    return Pipeline(sources, default_stages(), output_dir=output_dir, cache_dir=cache_dir, log=log)
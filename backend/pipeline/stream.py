@@ -0,0 +1,132 @@
+import os
+import json
+import time
+
+import pandas as pd
+
+from csv_tail import CsvTail, read_header
+from pipeline.stages import EXPORT_COLUMNS
+
+CHECKPOINT_FILE = "stream_checkpoint.json"
+
+def tweets_frame(rows) -> pd.DataFrame:
+    """New tweets.csv rows (dicts of strings) as the frame the `tweets` stage would load for them."""
+    tweets = pd.DataFrame(rows)
+    tweets['timestamp'] = pd.to_datetime(tweets['timestamp'], errors='coerce')
+    return tweets.sort_values(by='timestamp', kind='stable').reset_index(drop=True)
+
+class StreamWorker:
+    """
+    Follows tweets.csv and runs only the newly appended tweets through the
+    pipeline's enrichment stages, appending the results to analyzed_tweets.csv.
+
+    After each append the output is flushed to disk and a checkpoint (the read
+    position in the tweets file and the size of the output) is written atomically.
+    On restart, anything appended after the last checkpoint is truncated away
+    and those tweets are enriched again, so a crash never duplicates or loses rows.
+
+    Keywords are ranked by TF-IDF within each delta rather than across the whole
+    corpus; a batch `python -m pipeline run` recomputes them corpus-wide.
+    """
+
+    def __init__(self, pipeline, tweets_file: str, output_file: str, checkpoint_file: str = None, log=print):
+        self.pipeline = pipeline
+        self.output_file = output_file
+        self.checkpoint_file = checkpoint_file or os.path.join(pipeline.cache_dir, CHECKPOINT_FILE)
+        self.tail = CsvTail(tweets_file)
+        self.output_size = 0
+        self.log = log
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        with open(self.checkpoint_file, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if (checkpoint.get("tweets_file") != os.path.abspath(self.tail.path)
+                or checkpoint.get("output_file") != os.path.abspath(self.output_file)):
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self):
+        checkpoint = {
+            "tweets_file": os.path.abspath(self.tail.path),
+            "output_file": os.path.abspath(self.output_file),
+            "tail": self.tail.get_position(),
+            "output_size": self.output_size
+        }
+        tmp_path = f"{self.checkpoint_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_file)
+
+    def _truncate_output(self, size: int):
+        if os.path.exists(self.output_file):
+            with open(self.output_file, "r+b") as f:
+                f.truncate(size)
+        self.output_size = size
+
+    def resume(self, from_end: bool = False):
+        """
+        Continue from the checkpoint, dropping output written after it. Without a
+        usable checkpoint the output is rebuilt from the top of the tweets file, or,
+        with `from_end`, the existing output (e.g. from a batch run) is kept and only
+        tweets scraped from now on are enriched. An output shorter than its checkpoint,
+        or one written with other columns, is always rebuilt from the top.
+        """
+        checkpoint = self._load_checkpoint()
+        output_size = os.path.getsize(self.output_file) if os.path.exists(self.output_file) else 0
+        if checkpoint is not None:
+            if output_size >= checkpoint["output_size"]:
+                self.tail.set_position(checkpoint["tail"])
+                self._truncate_output(checkpoint["output_size"])
+                return
+            # Rows the checkpoint counted are gone and cannot be mapped back to tweets,
+            # so keeping the short file (even with from_end) would silently lose them
+            self.log(f"{self.output_file} is shorter than the checkpoint says; re-enriching from the top.")
+            from_end = False
+        if from_end and output_size > 0 and read_header(self.output_file)[0] != EXPORT_COLUMNS:
+            # Appending rows of another width under this header would misalign the columns
+            self.log(f"{self.output_file} does not have the current columns ({', '.join(EXPORT_COLUMNS)}); "
+                     "re-enriching from the top.")
+            from_end = False
+        if from_end and output_size > 0 and os.path.exists(self.tail.path):
+            self.tail.read()
+            self.output_size = output_size
+        else:
+            self._truncate_output(0)
+        self._save_checkpoint()
+
+    def step(self) -> int:
+        """Enrich and append the tweets added since the last step. Returns how many there were."""
+        if not os.path.exists(self.tail.path):
+            return 0
+        rows, rewritten = self.tail.read()
+        if rewritten:
+            self.log(f"{self.tail.path} was rewritten; enriching it again from the top.")
+            self._truncate_output(0)
+        if rows:
+            values = self.pipeline.run_in_memory({"tweets": tweets_frame(rows)}, ["enriched"])
+            data = values["enriched"][EXPORT_COLUMNS].to_csv(index=False, header=self.output_size == 0)
+            data = data.encode("utf-8")
+            with open(self.output_file, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.output_size += len(data)
+        if rows or rewritten:
+            self._save_checkpoint()
+        return len(rows)
+
+    def run(self, interval: float = 2.0, once: bool = False, from_end: bool = False):
+        """Poll the tweets file every `interval` seconds until interrupted (or once)."""
+        self.resume(from_end=from_end)
+        while True:
+            started = time.time()
+            count = self.step()
+            if count:
+                self.log(f"[stream] enriched {count} tweets ({time.time() - started:.1f}s)")
+            if once:
+                return
+            time.sleep(interval)
@@ -0,0 +1,103 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.kvcache import KeyValueCache, hash_key
+
+class GoogleTransBackend:
+    """googletrans; a list of texts is translated with one call."""
+
+    name = "googletrans"
+
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate_batch(self, texts, dest: str = "en"):
+        return [result.text for result in self.translator.translate(list(texts), dest=dest)]
+
+class EchoBackend:
+    """
+    Local stand-in that returns the input unchanged after an optional per-batch
+    delay, for tests and for benchmarking the stage without network access.
+    """
+
+    name = "echo"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def translate_batch(self, texts, dest: str = "en"):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return list(texts)
+
+TRANSLATION_BACKENDS = {
+    "googletrans": GoogleTransBackend,
+    "echo": EchoBackend
+}
+
+def get_backend(name: str):
+    if name not in TRANSLATION_BACKENDS:
+        raise ValueError(f"Unknown translation backend '{name}'. Expected one of {', '.join(TRANSLATION_BACKENDS)}.")
+    return TRANSLATION_BACKENDS[name]()
+
+def make_batches(texts, batch_size: int, max_chars: int):
+    """Split texts into batches of at most `batch_size` items and about `max_chars` characters."""
+    batch, chars = [], 0
+    for text in texts:
+        if batch and (len(batch) >= batch_size or chars + len(text) > max_chars):
+            yield batch
+            batch, chars = [], 0
+        batch.append(text)
+        chars += len(text)
+    if batch:
+        yield batch
+
+def _translate_with_retry(backend, batch, dest: str, retries: int, backoff: float):
+    for attempt in range(retries + 1):
+        try:
+            translated = backend.translate_batch(batch, dest=dest)
+            if len(translated) == len(batch):
+                return translated
+        except Exception:
+            pass
+        if attempt < retries:
+            time.sleep(backoff * (2 ** attempt))
+    return None
+
+def translate_texts(
+    texts,
+    backend,
+    cache: KeyValueCache = None,
+    dest: str = "en",
+    batch_size: int = 50,
+    max_chars: int = 4500,
+    max_workers: int = 4,
+    retries: int = 2,
+    backoff: float = 1.0
+):
+    """
+    Translate `texts` and return the translations in order.
+
+    Identical texts are translated once, cached translations are reused, and
+    the rest are sent in size-bounded batches over at most `max_workers`
+    concurrent requests. A batch that still fails after `retries` retries keeps
+    its original texts and is not cached, so the next run tries again.
+    """
+    keys = {text: hash_key(backend.name, dest, text) for text in set(texts)}
+    known = cache.get_many(keys.values()) if cache is not None else {}
+    missing = [text for text, key in keys.items() if key not in known]
+
+    batches = list(make_batches(missing, batch_size, max_chars))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda batch: _translate_with_retry(backend, batch, dest, retries, backoff), batches)
+        for batch, translated in zip(batches, results):
+            if translated is None:
+                continue
+            items = [(keys[text], result) for text, result in zip(batch, translated)]
+            known.update(items)
+            if cache is not None:
+                cache.put_many(items)
+    return [known.get(keys[text], text) for text in texts]
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("tldextract")
+
+from domain_index import DomainIndex, split_site
+
+SITES = ["cnn.com", "dailycitizen.focusonthefamily.com", "mrctv.org/cnsnews", "mrctv.org", "dailymail.co.uk"]
+
+@pytest.fixture(scope="module")
+def index():
+    return DomainIndex([{"Domain": site} for site in SITES])
+
+def matched(index, url):
+    record = index.lookup(url)
+    return record["Domain"] if record else None
+
+def test_split_site():
+    assert split_site("https://WWW.Example.com:8080/Path/") == ("example.com", "/path")
+    assert split_site("mrctv.org/cnsnews") == ("mrctv.org", "/cnsnews")
+
+def test_registered_domain_and_subdomains(index):
+    assert matched(index, "https://cnn.com") == "cnn.com"
+    assert matched(index, "https://www.cnn.com/world") == "cnn.com"
+    assert matched(index, "https://edition.cnn.com/2024/politics") == "cnn.com"
+
+def test_multi_part_suffix(index):
+    assert matched(index, "https://m.dailymail.co.uk/news/article-1.html") == "dailymail.co.uk"
+    assert matched(index, "https://co.uk/") is None
+
+def test_subdomain_entry_does_not_cover_its_parent(index):
+    assert matched(index, "https://dailycitizen.focusonthefamily.com/a") == "dailycitizen.focusonthefamily.com"
+    assert matched(index, "https://focusonthefamily.com/a") is None
+
+def test_path_entry_wins_over_its_domain(index):
+    assert matched(index, "https://mrctv.org/cnsnews/story") == "mrctv.org/cnsnews"
+    assert matched(index, "https://mrctv.org/cnsnewsletter") == "mrctv.org"
+    assert matched(index, "https://mrctv.org/videos") == "mrctv.org"
+
+def test_unknown_and_invalid(index):
+    assert matched(index, "https://example.org/") is None
+    assert matched(index, "not a url") is None
+    assert len(index) == len(SITES)
+
+def test_resolution_key(index):
+    assert index.resolution_key("https://edition.cnn.com/x") == "cnn.com"
+    assert index.resolution_key("https://example.org/a") == "example.org"
+    assert index.resolution_key("https://mrctv.org/videos") == "https://mrctv.org/videos"
@@ -0,0 +1,26 @@
+from tweet_tokenizer import HASHTAG, MENTION, NUMBER, TERM, URL, content_terms, core_urls, hashtags, mentions, tokenize, words
+
+def test_token_kinds():
+    tokens = tokenize("@Joe see https://ex.com/a?b=1. #Vote 2024 now")
+    assert [token.kind for token in tokens] == [MENTION, TERM, URL, HASHTAG, NUMBER, TERM]
+    assert [token.value for token in tokens] == ["joe", "see", "https://ex.com/a?b=1", "vote", "2024", "now"]
+
+def test_possessives_keep_the_base_word():
+    assert words(tokenize("Trump's rally and Biden’s plan")) == ["trump", "rally", "and", "biden", "plan"]
+
+def test_contractions_drop_the_apostrophe():
+    assert words(tokenize("Don't stop, they’re here")) == ["dont", "stop", "theyre", "here"]
+
+def test_mentions_hashtags_and_urls():
+    tokens = tokenize("@Ann @ann #War #War www.site.org/x http://a.com/b")
+    assert mentions(tokens) == ["Ann", "ann"]
+    assert hashtags(tokens) == ["#War"]
+    assert core_urls(tokens) == ["https://www.site.org/", "http://a.com/"]
+
+def test_content_terms_skip_stop_words_short_words_and_links():
+    tokens = tokenize("The war's end is near @bob https://x.com #peace")
+    assert content_terms(tokens, stop_words={"the", "near"}) == ["war", "end", "peace"]
+
+def test_non_text_has_no_tokens():
+    assert tokenize(None) == []
+    assert tokenize(float("nan")) == []
@@ -0,0 +1,124 @@
+import threading
+from collections import Counter, OrderedDict
+
+from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.feature_extraction.text import CountVectorizer
+
+from tweet_index import parse_query
+
+class TopicModelEntry:
+    """A fitted vectorizer/LDA pair and the slice of the index it has seen."""
+
+    def __init__(self, vectorizer, lda, version, last_doc_id, num_docs, fitted_docs):
+        self.vectorizer = vectorizer
+        self.lda = lda
+        self.version = version
+        self.last_doc_id = last_doc_id
+        self.num_docs = num_docs
+        self.fitted_docs = fitted_docs
+        self.lock = threading.Lock()
+
+def top_words(vectorizer, lda, n_words: int = 10):
+    """Top words for each LDA topic, keyed 'Topic 1', 'Topic 2', ..."""
+    feature_names = vectorizer.get_feature_names_out()
+    topics = {}
+    for idx, topic in enumerate(lda.components_):
+        top_indices = topic.argsort()[-n_words:][::-1]
+        topics[f"Topic {idx+1}"] = [feature_names[i] for i in top_indices]
+    return topics
+
+class TopicModelCache:
+    """
+    LRU cache of fitted topic models per (keyword query, n_topics, index generation).
+
+    A request at the index version the model was built on is a hit. When tweets
+    have been appended since, the matching new tweets are folded in with LDA's
+    online update (partial_fit) on the existing vocabulary instead of refitting.
+    The model is refit from scratch when the new tweets outnumber `refit_ratio`
+    times the tweets it was last fit on, so the vocabulary does not go stale.
+    Hits, fits, updates and evictions are counted in `stats`.
+    """
+
+    def __init__(self, max_entries: int = 32, refit_ratio: float = 0.5, max_features: int = 1000):
+        self.max_entries = max_entries
+        self.refit_ratio = refit_ratio
+        self.max_features = max_features
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = Counter(hits=0, fits=0, updates=0, evictions=0)
+
+    @staticmethod
+    def query_key(query: str):
+        return repr(parse_query(query))
+
+    def _fit(self, texts, n_topics: int):
+        vectorizer = CountVectorizer(stop_words='english', max_features=self.max_features)
+        dtm = vectorizer.fit_transform(texts)
+        lda = LatentDirichletAllocation(n_components=n_topics, random_state=42)
+        lda.fit(dtm)
+        return vectorizer, lda
+
+    def _entry(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _count(self, event: str):
+        with self.lock:
+            self.stats[event] += 1
+
+    def get_topics(self, index, query: str, n_topics: int):
+        """
+        Return (topics, number of tweets analyzed, cache event) for tweets in `index` matching `query`.
+        The event is one of 'hit', 'update' or 'fit'. Returns ({}, 0, None) when nothing matches.
+        """
+        with index.lock:
+            version = index.version
+            doc_ids = index.search(query)
+            key = (self.query_key(query), n_topics, index.generation)
+            entry = self._entry(key)
+            if entry is None or entry.version != version:
+                if entry is None:
+                    texts = [index.texts[i] for i in doc_ids]
+                else:
+                    texts = [index.texts[i] for i in doc_ids if i > entry.last_doc_id]
+            else:
+                texts = None
+        if not doc_ids:
+            return {}, 0, None
+        last_doc_id = doc_ids[-1]
+
+        if entry is not None:
+            with entry.lock:
+                if entry.version == version or not texts:
+                    entry.version = max(entry.version, version)
+                    self._count("hits")
+                    return top_words(entry.vectorizer, entry.lda), entry.num_docs, "hit"
+                if len(texts) <= self.refit_ratio * entry.fitted_docs:
+                    entry.lda.partial_fit(entry.vectorizer.transform(texts))
+                    entry.version = version
+                    entry.last_doc_id = last_doc_id
+                    entry.num_docs += len(texts)
+                    self._count("updates")
+                    return top_words(entry.vectorizer, entry.lda), entry.num_docs, "update"
+            with index.lock:
+                texts = [index.texts[i] for i in doc_ids]
+
+        vectorizer, lda = self._fit(texts, n_topics)
+        self._store(key, TopicModelEntry(vectorizer, lda, version, last_doc_id, len(texts), len(texts)))
+        self._count("fits")
+        return top_words(vectorizer, lda), len(texts), "fit"
+
+    def get_stats(self):
+        with self.lock:
+            return {**self.stats, "entries": len(self.entries), "max_entries": self.max_entries}
@@ -0,0 +1,117 @@
+import re
+import threading
+from collections import defaultdict
+
+from csv_tail import CsvTail
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+def normalize_tokens(text):
+    """Lowercased word tokens of a text, as stored in the index."""
+    if not isinstance(text, str):
+        return []
+    return [token.casefold() for token in TOKEN_RE.findall(text)]
+
+def parse_query(query: str):
+    """
+    Parse a keyword query into OR-ed clauses of AND-ed token sequences.
+
+    Bare words are AND-ed, the word OR (or |) separates alternatives and
+    "double quoted" text is matched as a phrase. A bare word that normalizes
+    to several tokens (e.g. "u.s.") is treated as a phrase as well.
+    Example: 'ukraine "peace talks" OR zelensky' -> [[["ukraine"], ["peace", "talks"]], [["zelensky"]]]
+    """
+    clauses = [[]]
+    for phrase, word in QUERY_RE.findall(query):
+        if not phrase and word in ("OR", "|"):
+            clauses.append([])
+            continue
+        tokens = normalize_tokens(phrase or word)
+        if tokens:
+            clauses[-1].append(tokens)
+    return [clause for clause in clauses if clause]
+
+class TweetIndex:
+    """
+    Inverted index from normalized token to the positions it occupies in each tweet
+    of a CSV file. Built once and then kept current by indexing only appended rows,
+    so keyword filters cost in proportion to the matching postings instead of a scan
+    over every tweet.
+    """
+
+    def __init__(self, tweets_file: str):
+        self.tweets_file = tweets_file
+        self.tail = CsvTail(tweets_file)
+        self.lock = threading.RLock()
+        # version changes on every update; generation only when the file was rewritten and ids were reassigned
+        self.version = 0
+        self.generation = 0
+        self._clear()
+
+    def _clear(self):
+        self.texts = []
+        self.timestamps = []
+        self.postings = defaultdict(dict)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, text, timestamp=None) -> int:
+        """Index one tweet and return its document id."""
+        with self.lock:
+            doc_id = len(self.texts)
+            self.texts.append(text if isinstance(text, str) else "")
+            self.timestamps.append(timestamp)
+            for position, token in enumerate(normalize_tokens(text)):
+                self.postings[token].setdefault(doc_id, []).append(position)
+            return doc_id
+
+    def sync(self) -> int:
+        """Index rows appended to the CSV since the last sync. Returns the number of new tweets."""
+        with self.lock:
+            rows, rewritten = self.tail.read()
+            if rewritten:
+                self._clear()
+                self.generation += 1
+            for row in rows:
+                self.add(row.get("text"), row.get("timestamp"))
+            if rows or rewritten:
+                self.version += 1
+            return len(rows)
+
+    def _docs_with(self, tokens):
+        """Documents containing the token sequence (a single token or a phrase)."""
+        postings = [self.postings.get(token) for token in tokens]
+        if not all(postings):
+            return set()
+        if len(tokens) == 1:
+            return set(postings[0])
+        order = sorted(range(len(tokens)), key=lambda i: len(postings[i]))
+        docs = set(postings[order[0]])
+        for i in order[1:]:
+            docs.intersection_update(postings[i])
+            if not docs:
+                return docs
+        matches = set()
+        for doc_id in docs:
+            following = [set(postings[i][doc_id]) for i in range(1, len(tokens))]
+            for start in postings[0][doc_id]:
+                if all(start + i + 1 in positions for i, positions in enumerate(following)):
+                    matches.add(doc_id)
+                    break
+        return matches
+
+    def search(self, query: str):
+        """Sorted ids of the tweets matching the query (see parse_query for the syntax)."""
+        with self.lock:
+            result = set()
+            for clause in parse_query(query):
+                clause = sorted(clause, key=lambda tokens: min(len(self.postings.get(t, ())) for t in tokens))
+                docs = self._docs_with(clause[0])
+                for tokens in clause[1:]:
+                    if not docs:
+                        break
+                    docs &= self._docs_with(tokens)
+                result |= docs
+            return sorted(result)
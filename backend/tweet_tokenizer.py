@@ -0,0 +1,76 @@
+import re
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+TERM = "term"
+MENTION = "mention"
+HASHTAG = "hashtag"
+URL = "url"
+NUMBER = "number"
+
+# One alternation, tried left to right at each position, so every text is scanned once
+TOKEN_RE = re.compile(r"""
+    (?P<url>https?://\S+|www\.\S+)
+  | (?P<mention>@\w+)
+  | (?P<hashtag>\#\w+)
+  | (?P<number>\d+(?:[.,:]\d+)*(?![\w']))
+  | (?P<term>\w+(?:['’]\w+)*)
+""", re.VERBOSE)
+
+# "Trump's" has the value "trump", so keyword lexicons match possessives
+POSSESSIVE_RE = re.compile(r"['’]s$")
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    # Lowercased text without the @/# sigil, a possessive 's or apostrophes; URLs are kept as written
+    value: str
+
+def tokenize(text):
+    """Typed tokens (term, mention, hashtag, URL, number) of a tweet in order of appearance."""
+    if not isinstance(text, str):
+        return []
+    tokens = []
+    for match in TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        raw = match.group()
+        if kind == URL:
+            value = raw.rstrip(".,;:!?)\"'")
+        elif kind in (MENTION, HASHTAG):
+            value = raw[1:].lower()
+        else:
+            value = POSSESSIVE_RE.sub("", raw.lower()).replace("'", "").replace("’", "")
+        tokens.append(Token(kind, raw, value))
+    return tokens
+
+def tokenize_many(texts):
+    """tokenize() over a column of texts."""
+    return [tokenize(text) for text in texts]
+
+def mentions(tokens):
+    """Distinct mentioned usernames, as written, in order of appearance."""
+    return list(dict.fromkeys(token.text[1:] for token in tokens if token.kind == MENTION))
+
+def hashtags(tokens):
+    """Distinct hashtags including the '#', in order of appearance."""
+    return list(dict.fromkeys(token.text for token in tokens if token.kind == HASHTAG))
+
+def urls(tokens):
+    return [token.value for token in tokens if token.kind == URL]
+
+def core_urls(tokens):
+    """Distinct scheme://host/ roots of the URLs in a tweet."""
+    roots = []
+    for url in urls(tokens):
+        parsed = urlparse(url if "://" in url else f"https://{url}")
+        if parsed.netloc:
+            roots.append(f"{parsed.scheme}://{parsed.netloc}/")
+    return list(dict.fromkeys(roots))
+
+def words(tokens):
+    """Lowercased words of a tweet, hashtag words included, for keyword matching."""
+    return [token.value for token in tokens if token.kind in (TERM, HASHTAG, NUMBER)]
+
+def content_terms(tokens, stop_words=frozenset(), min_length: int = 3):
+    """Words without URLs, mentions, stop words and short tokens, e.g. for co-occurrence."""
+    return [value for value in words(tokens) if len(value) >= min_length and value not in stop_words]
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import date, datetime
+
+import whois
+
+from domain_index import registered_parts, split_site
+
+# One file shared by every app that does WHOIS lookups (bc1 /whois, backend /check_news)
+WHOIS_CACHE_FILE = os.environ.get("WHOIS_CACHE_FILE", "whois_cache.sqlite")
+# Registration data changes over months; failures are retried much sooner
+WHOIS_TTL = float(os.environ.get("WHOIS_TTL", 30 * 24 * 3600))
+WHOIS_NEGATIVE_TTL = float(os.environ.get("WHOIS_NEGATIVE_TTL", 3600))
+
+class WhoisLookupError(Exception):
+    """A WHOIS lookup that failed, either now or recently enough to still be cached."""
+
+def registered_domain(url: str) -> str:
+    """Registered domain of a URL or host, e.g. "cnn.com" for https://edition.cnn.com/x."""
+    host, _ = split_site(url)
+    return registered_parts(host)[0] if host else ""
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def parse_date(value):
+    """First date of a cached WHOIS date field (ISO string or list of them) as a datetime, or None."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+class WhoisCache:
+    """
+    WHOIS records by registered domain in SQLite, so they survive restarts and are
+    shared between processes. Records are kept for `ttl` seconds and failures for
+    `negative_ttl`. Concurrent misses for the same domain in this process wait on
+    a single lookup. Dates are stored as ISO strings; see parse_date.
+    """
+
+    def __init__(self, path: str = WHOIS_CACHE_FILE, ttl: float = WHOIS_TTL,
+                 negative_ttl: float = WHOIS_NEGATIVE_TTL, lookup=whois.whois):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lookup = lookup
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS whois "
+            "(domain TEXT PRIMARY KEY, record TEXT, error TEXT, fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.db_lock = threading.Lock()
+        self.inflight_lock = threading.Lock()
+        self.inflight = {}
+
+    def _read(self, domain: str):
+        """(record, error) if a fresh entry is cached, else None."""
+        with self.db_lock:
+            row = self.conn.execute(
+                "SELECT record, error, fetched_at FROM whois WHERE domain = ?", (domain,)
+            ).fetchone()
+        if row is None:
+            return None
+        record, error, fetched_at = row
+        ttl = self.negative_ttl if error is not None else self.ttl
+        if time.time() - fetched_at >= ttl:
+            return None
+        return (json.loads(record) if record is not None else None), error
+
+    def _write(self, domain: str, record, error):
+        with self.db_lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO whois (domain, record, error, fetched_at) VALUES (?, ?, ?, ?)",
+                (domain, json.dumps(record) if record is not None else None, error, time.time())
+            )
+            self.conn.commit()
+
+    def _fetch(self, domain: str):
+        try:
+            entry = self.lookup(domain)
+        except Exception as e:
+            return None, str(e) or type(e).__name__
+        record = {key: _jsonable(value) for key, value in dict(entry or {}).items() if value is not None}
+        if not record:
+            return None, f"No WHOIS record found for {domain}"
+        return record, None
+
+    def _resolve(self, domain: str):
+        with self.inflight_lock:
+            future = self.inflight.get(domain)
+            owner = future is None
+            if owner:
+                future = self.inflight[domain] = Future()
+        if not owner:
+            return future.result()
+        try:
+            # Another process sharing the file may have looked it up meanwhile
+            result = self._read(domain)
+            if result is None:
+                result = self._fetch(domain)
+                self._write(domain, *result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.inflight_lock:
+                del self.inflight[domain]
+
+    def get(self, url: str) -> dict:
+        """
+        WHOIS record of the URL's registered domain (blocking on a miss).
+        Raises WhoisLookupError for invalid URLs and failed lookups.
+        """
+        domain = registered_domain(url)
+        if not domain:
+            raise WhoisLookupError("Invalid URL format")
+        result = self._read(domain)
+        if result is None:
+            result = self._resolve(domain)
+        record, error = result
+        if error is not None:
+            raise WhoisLookupError(error)
+        return dict(record)
+
+    def close(self):
+        self.conn.close()
@@ -150,12 +150,14 @@ elif page == "Term Co-occurrence Analysis":
     st.markdown("""
     This section performs term co-occurrence analysis on tweets.  
     Adjust the parameters below and run the analysis.  
-    The AI analysis and interactive network visualization will be returned.
+    The interactive network visualization is shown first; the AI analysis follows when it is ready.
     """)
     tweets_file = st.text_input("Tweets File", value="tweets.csv")
     min_term_count = st.number_input("Minimum Term Count", min_value=1, value=2, step=1)
     max_terms = st.number_input("Maximum Terms", min_value=1, value=200, step=1)
     min_edge_weight = st.number_input("Minimum Edge Weight", min_value=1, value=2, step=1)
+    edge_budget = st.number_input("Edge Budget", min_value=1, value=2000, step=100)
+    prune_method = st.radio("Edge Pruning", options=["weight", "backbone"])
     if st.button("Run Term Co-occurrence Analysis"):
         with st.spinner("Analyzing term co-occurrence..."):
             try:
@@ -163,20 +165,42 @@ elif page == "Term Co-occurrence Analysis":
                     "tweets_file": tweets_file,
                     "min_term_count": min_term_count,
                     "max_terms": max_terms,
-                    "min_edge_weight": min_edge_weight
+                    "min_edge_weight": min_edge_weight,
+                    "edge_budget": edge_budget,
+                    "prune_method": prune_method
                 }
                 response = requests.get(f"{BASE_URL}/cooccurrence", params=params)
                 response.raise_for_status()
-                result = response.json()
-                st.success("Term co-occurrence analysis complete!")
-                st.subheader("AI-Generated Analysis")
-                st.json(result.get("analysis", {}))
-                visualization_file = result.get("visualization_file", "term_cooccurrence_graph.html")
-                st.subheader("Interactive Network Visualization")
-                vis_url = f"{BASE_URL}/visualization?file={visualization_file}"
-                st.components.v1.iframe(vis_url, height=800, scrolling=True)
+                # Kept across reruns, so checking on the AI analysis does not rebuild the graph
+                st.session_state["cooccurrence_result"] = response.json()
+                st.session_state["cooccurrence_analysis"] = None
+                st.success("Term co-occurrence graph built!")
             except Exception as e:
                 st.error(f"Error during term co-occurrence analysis: {e}")
+                st.session_state.pop("cooccurrence_result", None)
+    result = st.session_state.get("cooccurrence_result")
+    if result:
+        st.json(result.get("graph", {}))
+        visualization_file = result.get("visualization_file", "term_cooccurrence_graph.html")
+        st.subheader("Interactive Network Visualization")
+        vis_url = f"{BASE_URL}/visualization?file={visualization_file}"
+        st.components.v1.iframe(vis_url, height=800, scrolling=True)
+    if result and result.get("analysis_id"):
+        st.subheader("AI-Generated Analysis")
+        if st.session_state.get("cooccurrence_analysis") is None or st.button("Check analysis"):
+            with st.spinner("Waiting for AI analysis..."):
+                try:
+                    analysis_url = f"{BASE_URL}/cooccurrence/analysis/{result['analysis_id']}"
+                    analysis_response = requests.get(analysis_url, params={"wait": 60})
+                    analysis_response.raise_for_status()
+                    st.session_state["cooccurrence_analysis"] = analysis_response.json()
+                except Exception as e:
+                    st.error(f"Error fetching AI analysis: {e}")
+        analysis_result = st.session_state.get("cooccurrence_analysis")
+        if analysis_result and analysis_result.get("status") == "pending":
+            st.info("The AI analysis is still running. Use Check analysis to look again.")
+        elif analysis_result:
+            st.json(analysis_result.get("analysis", {}))
 
 st.markdown("""
 ---